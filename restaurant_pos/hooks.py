@@ -90,6 +90,16 @@ doc_events = {
         "on_submit": "restaurant_pos.restaurant_pos.events.stock_entry.on_submit",
         "on_cancel": "restaurant_pos.restaurant_pos.events.stock_entry.on_cancel",
     },
+    "Branch": {
+        "on_update": "restaurant_pos.restaurant_pos.events.branch.on_update",
+        "on_trash": "restaurant_pos.restaurant_pos.events.branch.on_trash",
+    },
+    "Global Defaults": {
+        "on_update": "restaurant_pos.restaurant_pos.events.currency.on_update",
+    },
+    "Currency": {
+        "on_update": "restaurant_pos.restaurant_pos.events.currency.on_update",
+    },
     "Restaurant Order": {
         "on_submit": "restaurant_pos.restaurant_pos.events.restaurant_order.on_submit",
         "on_cancel": "restaurant_pos.restaurant_pos.events.restaurant_order.on_cancel",
@@ -0,0 +1,16 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Add composite indexes used by the waiter floor view, ready pickups and calls on existing sites
+"""
+
+from restaurant_pos.restaurant_pos.doctype.kitchen_order import kitchen_order
+from restaurant_pos.restaurant_pos.doctype.restaurant_table import restaurant_table
+from restaurant_pos.restaurant_pos.doctype.waiter_call import waiter_call
+
+
+def execute():
+    restaurant_table.on_doctype_update()
+    kitchen_order.on_doctype_update()
+    waiter_call.on_doctype_update()
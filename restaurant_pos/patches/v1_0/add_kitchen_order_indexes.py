@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Add composite indexes used by the Kitchen Display queries on existing sites
+"""
+
+from restaurant_pos.restaurant_pos.doctype.kitchen_order import kitchen_order
+from restaurant_pos.restaurant_pos.doctype.restaurant_order_item import restaurant_order_item
+
+
+def execute():
+    kitchen_order.on_doctype_update()
+    restaurant_order_item.on_doctype_update()
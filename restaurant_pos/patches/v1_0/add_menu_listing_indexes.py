@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Add composite indexes used by the digital menu listing on existing sites
+"""
+
+from restaurant_pos.restaurant_pos.doctype.menu_category import menu_category
+from restaurant_pos.restaurant_pos.doctype.menu_item import menu_item
+
+
+def execute():
+    menu_category.on_doctype_update()
+    menu_item.on_doctype_update()
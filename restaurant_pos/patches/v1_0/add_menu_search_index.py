@@ -0,0 +1,12 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Add the FULLTEXT index used by menu search on existing sites
+"""
+
+from restaurant_pos.restaurant_pos.doctype.menu_item import menu_item
+
+
+def execute():
+    menu_item.on_doctype_update()
@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Add composite indexes used by table session and order lookups on existing sites
+"""
+
+from restaurant_pos.restaurant_pos.doctype.restaurant_order import restaurant_order
+from restaurant_pos.restaurant_pos.doctype.table_session import table_session
+
+
+def execute():
+    restaurant_order.on_doctype_update()
+    table_session.on_doctype_update()
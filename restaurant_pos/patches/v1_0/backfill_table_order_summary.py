@@ -0,0 +1,19 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Fill the denormalized current order summary on tables that already hold an order
+"""
+
+import frappe
+
+
+def execute():
+    frappe.db.sql("""
+        UPDATE `tabRestaurant Table` t
+        INNER JOIN `tabRestaurant Order` o ON o.name = t.current_order
+        SET t.order_status = o.status,
+            t.order_guest_count = o.guest_count,
+            t.order_grand_total = o.grand_total,
+            t.order_started_at = o.creation
+    """)
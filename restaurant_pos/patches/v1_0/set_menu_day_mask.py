@@ -0,0 +1,27 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Build the weekday bitmask for menu items and categories that already have available days
+"""
+
+from collections import defaultdict
+
+import frappe
+
+from restaurant_pos.restaurant_pos.utils import get_day_mask
+
+
+def execute():
+    rows = frappe.get_all(
+        "Available Day",
+        filters={"parenttype": ["in", ["Menu Item", "Menu Category"]]},
+        fields=["parent", "parenttype", "day"]
+    )
+    
+    days_by_parent = defaultdict(list)
+    for row in rows:
+        days_by_parent[(row.parenttype, row.parent)].append(row)
+    
+    for (doctype, name), days in days_by_parent.items():
+        frappe.db.set_value(doctype, name, "day_mask", get_day_mask(days), update_modified=False)
@@ -18,39 +18,62 @@ def get_boot_info(bootinfo):
     }
 
 
+BOOT_SETTINGS_CACHE_KEY = "restaurant_pos:settings_boot"
+
+
 def get_restaurant_settings():
     """Get restaurant settings for current user"""
+    cached = frappe.cache().get_value(BOOT_SETTINGS_CACHE_KEY)
+    if cached is not None:
+        return cached
+    
     try:
-        settings = frappe.get_single("Restaurant Settings")
-        return {
+        settings = frappe.get_cached_doc("Restaurant Settings")
+        currency = frappe.defaults.get_global_default("currency")
+        result = {
             "enable_qr_ordering": settings.enable_qr_ordering,
             "enable_kitchen_display": settings.enable_kitchen_display,
             "enable_call_waiter": getattr(settings, "enable_waiter_calls", False),
             "default_language": getattr(settings, "default_language", "en"),
             "session_timeout_minutes": getattr(settings, "session_timeout_minutes", 30),
-            "currency": frappe.defaults.get_global_default("currency"),
-            "currency_symbol": frappe.db.get_value("Currency", 
-                frappe.defaults.get_global_default("currency"), "symbol") or "",
+            "currency": currency,
+            "currency_symbol": frappe.db.get_value("Currency", currency, "symbol") or "",
         }
     except Exception:
         return {}
+    
+    frappe.cache().set_value(BOOT_SETTINGS_CACHE_KEY, result, expires_in_sec=60)
+    return result
+
+
+def clear_boot_settings_cache():
+    """Drop cached boot settings after Restaurant Settings change"""
+    frappe.cache().delete_value(BOOT_SETTINGS_CACHE_KEY)
+
+
+RESTAURANT_ROLES = frozenset((
+    "Restaurant Manager",
+    "Waiter",
+    "Kitchen Staff",
+    "Cashier",
+    "Kitchen Display"
+))
+
+KITCHEN_STATIONS_CACHE_PREFIX = "restaurant_pos:stations:"
 
 
 def get_user_restaurant_roles():
     """Get restaurant-specific roles for current user"""
-    user_roles = frappe.get_roles()
-    restaurant_roles = [
-        "Restaurant Manager",
-        "Waiter",
-        "Kitchen Staff",
-        "Cashier",
-        "Kitchen Display"
-    ]
-    return [r for r in restaurant_roles if r in user_roles]
+    return list(RESTAURANT_ROLES.intersection(frappe.get_roles()))
 
 
 def get_user_kitchen_stations():
     """Get kitchen stations assigned to current user"""
+    cache_key = f"{KITCHEN_STATIONS_CACHE_PREFIX}{frappe.session.user}"
+    cached = frappe.cache().get_value(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # Check if Kitchen Station User child table exists
         if frappe.db.exists("DocType", "Kitchen Station User"):
@@ -59,7 +82,7 @@ def get_user_kitchen_stations():
                 filters={"user": frappe.session.user},
                 fields=["parent as station"]
             )
-            return [s.station for s in stations]
+            result = [s.station for s in stations]
         else:
             # Return all active stations if no user assignment exists
             stations = frappe.get_all(
@@ -67,6 +90,14 @@ def get_user_kitchen_stations():
                 filters={"is_active": 1},
                 fields=["name"]
             )
-            return [s.name for s in stations]
+            result = [s.name for s in stations]
     except Exception:
         return []
+    
+    frappe.cache().set_value(cache_key, result, expires_in_sec=300)
+    return result
+
+
+def clear_kitchen_stations_cache():
+    """Drop cached station lists for all users after a Kitchen Station change"""
+    frappe.cache().delete_keys(KITCHEN_STATIONS_CACHE_PREFIX)
@@ -27,7 +27,7 @@ def get_pos_data():
         
         # Get settings safely
         try:
-            settings = frappe.get_single("Restaurant Settings")
+            settings = frappe.get_cached_doc("Restaurant Settings")
         except Exception:
             settings = frappe._dict()
         
@@ -324,7 +324,7 @@ def create_order(order_data):
             order_data = json.loads(order_data)
         
         # Get settings
-        settings = frappe.get_single("Restaurant Settings")
+        settings = frappe.get_cached_doc("Restaurant Settings")
         try:
             branch = frappe.db.get_value("User", frappe.session.user, "branch") or frappe.db.get_value("User", frappe.session.user, "default_branch")
         except Exception:
@@ -456,6 +456,9 @@ def create_order(order_data):
 
 def get_or_create_table_session(table, customer_name=None, guest_count=1):
     """Get existing table session or create new one"""
+    # Lock the table row so concurrent requests serialize on the session check
+    frappe.db.get_value("Restaurant Table", table, "current_session", for_update=True)
+    
     # Check for existing open session (Active or Ordering)
     existing = frappe.db.get_value(
         "Table Session",
@@ -1029,7 +1032,7 @@ def get_waiter_data():
         )
         
         # Get settings
-        settings = frappe.get_single("Restaurant Settings")
+        settings = frappe.get_cached_doc("Restaurant Settings")
         
         return {
             "success": True,
@@ -1185,7 +1188,7 @@ def add_items_to_order(order_id, items):
             })
         
         # Recalculate totals
-        settings = frappe.get_single("Restaurant Settings")
+        settings = frappe.get_cached_doc("Restaurant Settings")
         
         subtotal = sum(flt(item.amount) for item in order.items)
         after_discount = subtotal - flt(order.discount_amount)
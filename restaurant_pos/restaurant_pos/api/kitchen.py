@@ -5,13 +5,23 @@
 Kitchen API - Endpoints for Kitchen Display System (KDS)
 """
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, time_diff_in_seconds
+from frappe.utils import add_days, cint, now_datetime, time_diff_in_seconds
+
+from restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order import update_table_order_summary
+
+# KOT statuses shown on the kitchen display
+ACTIVE_KOT_STATUSES = ("Pending", "Preparing", "Ready")
+
+# Restaurant Order statuses that KOT progress must not overwrite
+FINAL_ORDER_STATUSES = ("Served", "Completed", "Cancelled", "Paid")
 
 
 @frappe.whitelist()
-def get_kitchen_orders(station=None, branch=None, status=None):
+def get_kitchen_orders(station=None, branch=None, status=None, page_length=0, start=0, compact=0):
     """
     Get orders for kitchen display
     
@@ -19,10 +29,15 @@ def get_kitchen_orders(station=None, branch=None, status=None):
         station: Kitchen station filter
         branch: Branch filter
         status: Status filter (New, Preparing, Ready)
+        page_length: Maximum number of orders to return (0 for all)
+        start: Offset of the first order to return
+        compact: Omit order notes from the payload
     
     Returns:
         list: Kitchen orders
     """
+    page_length = cint(page_length)
+    compact = cint(compact)
     filters = {}
     
     if station:
@@ -32,38 +47,55 @@ def get_kitchen_orders(station=None, branch=None, status=None):
     if status:
         filters["status"] = status
     else:
-        filters["status"] = ["in", ["Pending", "Preparing", "Ready"]]
+        filters["status"] = ["in", ACTIVE_KOT_STATUSES]
+    
+    fields = [
+        "name", "restaurant_order", "table_number", "order_type",
+        "kitchen_station", "status", "priority",
+        "creation", "started_at", "completed_at", "is_additional"
+    ]
+    if not compact:
+        fields.append("notes")
     
     orders = frappe.get_all(
         "Kitchen Order",
         filters=filters,
+        fields=fields,
+        order_by="priority desc, creation asc",
+        limit_start=cint(start),
+        limit_page_length=page_length
+    )
+    has_more = bool(page_length) and len(orders) == page_length
+    
+    if not orders:
+        return {"success": True, "data": [], "has_more": False}
+    
+    # Fetch items for all orders in one query and group them by parent
+    items_by_parent = defaultdict(list)
+    for item in frappe.get_all(
+        "Kitchen Order Item",
+        filters={"parent": ["in", [order.name for order in orders]]},
         fields=[
-            "name", "restaurant_order", "table_number", "order_type",
-            "kitchen_station", "status", "priority", "notes",
-            "creation", "started_at", "completed_at", "is_additional"
+            "name", "parent", "menu_item", "item_name", "item_name_ar",
+            "qty", "modifiers", "special_instructions", "status"
         ],
-        order_by="priority desc, creation asc"
-    )
+        order_by="parent asc, idx asc"
+    ):
+        items_by_parent[item.parent].append(item)
+    
+    parse_json = frappe.parse_json
+    now = now_datetime()
     
     result = []
     for order in orders:
-        # Get order items
-        items = frappe.get_all(
-            "Kitchen Order Item",
-            filters={"parent": order.name},
-            fields=[
-                "name", "menu_item", "item_name", "item_name_ar",
-                "qty", "modifiers", "special_instructions", "status"
-            ],
-            order_by="idx asc"
-        )
+        items = items_by_parent[order.name]
         
         # Calculate elapsed time
         elapsed_time = 0
         if order.status == "Preparing" and order.started_at:
-            elapsed_time = time_diff_in_seconds(now_datetime(), order.started_at)
+            elapsed_time = time_diff_in_seconds(now, order.started_at)
         elif order.status == "Pending":
-            elapsed_time = time_diff_in_seconds(now_datetime(), order.creation)
+            elapsed_time = time_diff_in_seconds(now, order.creation)
         
         # Process items with fallback for missing item_name
         processed_items = []
@@ -92,7 +124,7 @@ def get_kitchen_orders(station=None, branch=None, status=None):
                 "name": item_name or item.menu_item,
                 "name_ar": item_name_ar,
                 "qty": item.qty,
-                "modifiers": frappe.parse_json(item.modifiers) if item.modifiers else [],
+                "modifiers": parse_json(item.modifiers) if item.modifiers else [],
                 "notes": item.special_instructions,
                 "status": item.status
             })
@@ -105,14 +137,14 @@ def get_kitchen_orders(station=None, branch=None, status=None):
             "station": order.kitchen_station,
             "status": order.status,
             "priority": order.priority,
-            "notes": order.notes,
+            "notes": order.get("notes"),
             "is_additional": order.is_additional,
             "elapsed_time": int(elapsed_time),
             "created_at": str(order.creation),
             "items": processed_items
         })
     
-    return {"success": True, "data": result}
+    return {"success": True, "data": result, "has_more": has_more}
 
 
 @frappe.whitelist()
@@ -129,76 +161,86 @@ def update_order_status(kot_id, status, item_id=None):
         dict: Updated status
     """
     try:
-        kot = frappe.get_doc("Kitchen Order", kot_id)
+        # Writes below bypass save(), so enforce the Select options here
+        validate_status("Kitchen Order Item" if item_id else "Kitchen Order", status)
+        
+        kot = get_kitchen_order_info(kot_id)
         
         if item_id:
             # Update specific item
-            for item in kot.items:
-                if item.name == item_id:
-                    item.status = status
-                    if status == "Preparing":
-                        item.started_at = now_datetime()
-                    elif status == "Ready":
-                        item.completed_at = now_datetime()
-                    break
+            item_values = {"status": status}
+            if status == "Preparing":
+                item_values["started_at"] = now_datetime()
+            elif status == "Ready":
+                item_values["completed_at"] = now_datetime()
+            frappe.db.set_value("Kitchen Order Item", {"name": item_id, "parent": kot_id}, item_values)
             
             # Check if all items are ready
-            all_ready = all(item.status == "Ready" for item in kot.items)
+            all_ready = not frappe.db.sql("""
+                SELECT 1 FROM `tabKitchen Order Item`
+                WHERE parent = %s AND status != 'Ready'
+                LIMIT 1
+            """, kot_id)
             if all_ready:
                 kot.status = "Ready"
-                kot.completed_at = now_datetime()
+                frappe.db.set_value("Kitchen Order", kot_id, {
+                    "status": "Ready",
+                    "completed_at": now_datetime()
+                })
         else:
             # Update entire order
             kot.status = status
+            values = {"status": status}
+            
             if status == "Preparing":
-                kot.started_at = now_datetime()
+                values["started_at"] = now_datetime()
                 # Update all pending items
-                for item in kot.items:
-                    if item.status == "Pending":
-                        item.status = "Preparing"
-                        item.started_at = now_datetime()
+                frappe.db.sql("""
+                    UPDATE `tabKitchen Order Item`
+                    SET status = 'Preparing', started_at = COALESCE(started_at, %s)
+                    WHERE parent = %s AND status = 'Pending'
+                """, (values["started_at"], kot_id))
             elif status == "Ready":
-                kot.completed_at = now_datetime()
+                values["completed_at"] = now_datetime()
                 # Update all items
-                for item in kot.items:
-                    if item.status != "Ready":
-                        item.status = "Ready"
-                        item.completed_at = now_datetime()
-        
-        kot.save(ignore_permissions=True)
+                frappe.db.sql("""
+                    UPDATE `tabKitchen Order Item`
+                    SET status = 'Ready', completed_at = %s
+                    WHERE parent = %s AND status != 'Ready'
+                """, (values["completed_at"], kot_id))
+            
+            frappe.db.set_value("Kitchen Order", kot_id, values)
         
         # Update main order status
         update_restaurant_order_status(kot.restaurant_order)
         
-        # Send real-time update
+        # Send real-time update; the same payload tells waiters when it is ready
+        ready = kot.status == "Ready"
+        message = {
+            "kot_id": kot_id,
+            "order_id": kot.restaurant_order,
+            "table_number": kot.table_number,
+            "status": kot.status,
+            "station": kot.kitchen_station,
+            "ready": ready,
+            "timestamp": str(now_datetime())
+        }
         frappe.publish_realtime(
             event="restaurant:kot_update",
-            message={
-                "kot_id": kot_id,
-                "order_id": kot.restaurant_order,
-                "table_number": kot.table_number,
-                "status": kot.status,
-                "station": kot.kitchen_station,
-                "timestamp": str(now_datetime())
-            },
-            room=f"kitchen:{kot.branch}"
+            message=message,
+            room=f"kitchen:{kot.branch}",
+            after_commit=True
         )
         
         # Notify waiters if ready
-        if kot.status == "Ready":
+        if ready:
             frappe.publish_realtime(
                 event="restaurant:order_ready",
-                message={
-                    "kot_id": kot_id,
-                    "order_id": kot.restaurant_order,
-                    "table_number": kot.table_number,
-                    "station": kot.kitchen_station,
-                },
-                room=f"waiters:{kot.branch}"
+                message=message,
+                room=f"waiters:{kot.branch}",
+                after_commit=True
             )
         
-        frappe.db.commit()
-        
         return {
             "success": True,
             "message": _("Status updated"),
@@ -216,35 +258,34 @@ def update_order_status(kot_id, status, item_id=None):
 def update_restaurant_order_status(order_name):
     """Update main order status based on KOT statuses"""
     try:
-        # Get all KOTs for this order
-        kots = frappe.get_all(
-            "Kitchen Order",
-            filters={"restaurant_order": order_name},
-            fields=["status"]
-        )
+        # Get the distinct KOT statuses for this order
+        statuses = {
+            row[0] for row in frappe.db.sql("""
+                SELECT DISTINCT status FROM `tabKitchen Order`
+                WHERE restaurant_order = %s
+            """, order_name)
+        }
         
-        if not kots:
+        if not statuses:
             return
         
         # Determine order status
-        statuses = [k.status for k in kots]
-        
-        if all(s == "Served" for s in statuses):
+        if statuses == {"Served"}:
             new_status = "Served"
-        elif all(s == "Ready" for s in statuses):
+        elif statuses == {"Ready"}:
             new_status = "Ready"
-        elif any(s in ("Preparing", "Ready") for s in statuses):
+        elif statuses & {"Preparing", "Ready"}:
             new_status = "Preparing"
-        elif all(s == "Pending" for s in statuses):
+        elif statuses == {"Pending"}:
             new_status = "Confirmed"
-        elif all(s == "Cancelled" for s in statuses):
+        elif statuses == {"Cancelled"}:
             new_status = "Cancelled"
         else:
             new_status = "Preparing"
         
         # Update order
         order = frappe.get_doc("Restaurant Order", order_name)
-        if order.status not in ["Served", "Completed", "Cancelled", "Paid"]:
+        if order.status not in FINAL_ORDER_STATUSES:
             order.status = new_status
             order.save(ignore_permissions=True)
             
@@ -256,13 +297,33 @@ def update_restaurant_order_status(order_name):
                     "status": new_status,
                     "table_number": order.table_number,
                 },
-                room=f"order:{order_name}"
+                room=f"order:{order_name}",
+                after_commit=True
             )
             
     except Exception as e:
         frappe.log_error(f"Order Status Update Error: {str(e)}", "Restaurant POS")
 
 
+def validate_status(doctype, status):
+    """Reject a status that is not one of the doctype's Select options"""
+    options = (frappe.get_meta(doctype).get_field("status").options or "").split("\n")
+    if status not in options:
+        frappe.throw(_("Invalid status: {0}").format(status), frappe.ValidationError)
+
+
+def get_kitchen_order_info(kot_id):
+    """Fetch the Kitchen Order header fields needed by the KDS update paths"""
+    kot = frappe.db.get_value(
+        "Kitchen Order", kot_id,
+        ["name", "restaurant_order", "table_number", "kitchen_station", "branch", "status"],
+        as_dict=True
+    )
+    if not kot:
+        frappe.throw(_("Kitchen Order {0} not found").format(kot_id), frappe.DoesNotExistError)
+    return kot
+
+
 @frappe.whitelist()
 def bump_order(kot_id):
     """
@@ -275,23 +336,26 @@ def bump_order(kot_id):
         dict: Confirmation
     """
     try:
-        kot = frappe.get_doc("Kitchen Order", kot_id)
-        kot.status = "Served"
-        kot.served_at = now_datetime()
+        kot = get_kitchen_order_info(kot_id)
         
-        for item in kot.items:
-            item.status = "Served"
+        frappe.db.set_value("Kitchen Order", kot_id, {
+            "status": "Served",
+            "served_at": now_datetime()
+        })
+        frappe.db.sql("""
+            UPDATE `tabKitchen Order Item`
+            SET status = 'Served'
+            WHERE parent = %s
+        """, kot_id)
         
-        kot.save(ignore_permissions=True)
+        update_restaurant_order_status(kot.restaurant_order)
         
         # Check if all KOTs are served
-        all_served = not frappe.db.exists(
-            "Kitchen Order",
-            {
-                "restaurant_order": kot.restaurant_order,
-                "status": ["not in", ["Served", "Cancelled"]]
-            }
-        )
+        all_served = not frappe.db.sql("""
+            SELECT 1 FROM `tabKitchen Order`
+            WHERE restaurant_order = %s AND status NOT IN ('Served', 'Cancelled')
+            LIMIT 1
+        """, kot.restaurant_order)
         
         if all_served:
             frappe.db.set_value(
@@ -300,18 +364,21 @@ def bump_order(kot_id):
                 "status", 
                 "Served"
             )
+            update_table_order_summary(kot.restaurant_order, {"status": "Served"})
         
         # Update order items status
-        for item in kot.items:
-            if item.order_item:
-                frappe.db.set_value(
-                    "Restaurant Order Item",
-                    item.order_item,
-                    "status",
-                    "Served"
-                )
-        
-        frappe.db.commit()
+        order_items = tuple(frappe.get_all(
+            "Kitchen Order Item",
+            filters={"parent": kot_id, "order_item": ["is", "set"]},
+            pluck="order_item",
+            order_by=None
+        ))
+        if order_items:
+            frappe.db.sql("""
+                UPDATE `tabRestaurant Order Item`
+                SET status = %s, modified = NOW(), modified_by = %s
+                WHERE name IN %s
+            """, ("Served", frappe.session.user, order_items))
         
         return {"success": True, "message": _("Order bumped")}
         
@@ -332,20 +399,21 @@ def recall_order(kot_id):
         dict: Confirmation
     """
     try:
-        kot = frappe.get_doc("Kitchen Order", kot_id)
-        kot.status = "Ready"
-        kot.served_at = None
-        
-        for item in kot.items:
-            item.status = "Ready"
+        kot = get_kitchen_order_info(kot_id)
         
-        kot.save(ignore_permissions=True)
+        frappe.db.set_value("Kitchen Order", kot_id, {
+            "status": "Ready",
+            "served_at": None
+        })
+        frappe.db.sql("""
+            UPDATE `tabKitchen Order Item`
+            SET status = 'Ready'
+            WHERE parent = %s
+        """, kot_id)
         
         # Update main order based on all KOT statuses
         update_restaurant_order_status(kot.restaurant_order)
         
-        frappe.db.commit()
-        
         # Notify kitchen
         frappe.publish_realtime(
             event="restaurant:kot_recall",
@@ -353,7 +421,8 @@ def recall_order(kot_id):
                 "kot_id": kot_id,
                 "table_number": kot.table_number,
             },
-            room=f"kitchen:{kot.branch}"
+            room=f"kitchen:{kot.branch}",
+            after_commit=True
         )
         
         return {"success": True, "message": _("Order recalled")}
@@ -378,7 +447,7 @@ def set_priority(kot_id, priority):
     try:
         frappe.db.set_value("Kitchen Order", kot_id, "priority", priority)
         
-        kot = frappe.get_doc("Kitchen Order", kot_id)
+        kot = get_kitchen_order_info(kot_id)
         
         frappe.publish_realtime(
             event="restaurant:kot_priority",
@@ -387,11 +456,10 @@ def set_priority(kot_id, priority):
                 "priority": priority,
                 "table_number": kot.table_number,
             },
-            room=f"kitchen:{kot.branch}"
+            room=f"kitchen:{kot.branch}",
+            after_commit=True
         )
         
-        frappe.db.commit()
-        
         return {"success": True, "message": _("Priority updated")}
         
     except Exception as e:
@@ -416,18 +484,27 @@ def get_kitchen_stats(station=None, branch=None):
     if branch:
         filters["branch"] = branch
     
-    # Count by status
-    new_count = frappe.db.count("Kitchen Order", {**filters, "status": "Pending"})
-    preparing_count = frappe.db.count("Kitchen Order", {**filters, "status": "Preparing"})
-    ready_count = frappe.db.count("Kitchen Order", {**filters, "status": "Ready"})
+    # Count by status in a single grouped query
+    status_counts = {
+        row.status: row.count
+        for row in frappe.get_all(
+            "Kitchen Order",
+            filters={**filters, "status": ["in", ACTIVE_KOT_STATUSES]},
+            fields=["status", "count(name) as count"],
+            group_by="status",
+            order_by=None
+        )
+    }
+    new_count = status_counts.get("Pending", 0)
+    preparing_count = status_counts.get("Preparing", 0)
+    ready_count = status_counts.get("Ready", 0)
     
     # Average preparation time (last 24 hours)
-    from frappe.utils import add_days
     yesterday = add_days(now_datetime(), -1)
     
     # Build parameterized query — no string formatting of user-supplied values
-    conditions = ["status = 'Ready'", "completed_at >= %s", "started_at IS NOT NULL", "completed_at IS NOT NULL"]
-    params = [yesterday]
+    conditions = ["status = %s", "completed_at >= %s", "started_at IS NOT NULL", "completed_at IS NOT NULL"]
+    params = ["Ready", yesterday]
 
     if station:
         conditions.append("kitchen_station = %s")
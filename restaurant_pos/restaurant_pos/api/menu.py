@@ -6,10 +6,55 @@ Menu API - Public endpoints for digital menu
 These APIs are accessible without login (guest access)
 """
 
+import hashlib
+import re
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.utils import cint, flt, now_datetime
 
+MENU_CACHE_PREFIX = "restaurant_pos:menu:"
+MENU_CATEGORY_CACHE_PREFIX = "restaurant_pos:menu_category:"
+ITEM_DETAILS_CACHE_PREFIX = "restaurant_pos:item:"
+TABLE_BY_QR_CACHE_KEY = "restaurant_pos:qr"
+CURRENCY_INFO_CACHE_KEY = "restaurant_pos:currency_info"
+
+# Upper bound on how long a currency change made outside the app stays hidden
+CURRENCY_INFO_TTL = 3600
+
+# Number of leading items per category whose details are pre-built
+PREFETCH_ITEMS_PER_CATEGORY = 10
+
+# Characters with special meaning in MariaDB boolean-mode FULLTEXT queries
+FULLTEXT_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+MENU_SETTINGS_FIELDS = [
+    "enable_waiter_calls", "enable_online_payment", "min_order_amount",
+    "service_charge_percent", "vat_percent"
+]
+
+# spicy_level values that mean the item is not spicy
+NO_SPICE_LEVELS = frozenset(("None", "0", ""))
+
+# Language-specific columns are resolved by the query via %(language)s
+MENU_ITEM_COLUMNS = """
+    name, item_code,
+    CASE WHEN %(language)s = 'ar' THEN item_name_ar ELSE item_name END AS title,
+    CASE WHEN %(language)s = 'ar' THEN description_ar ELSE description END AS description,
+    image, category, price, discounted_price, is_sold_out,
+    preparation_time, calories, spicy_level,
+    display_order, allow_customization
+"""
+
+ITEM_DETAILS_FIELDS = [
+    "name", "item_code", "item_name", "item_name_ar",
+    "description", "description_ar", "image", "thumbnail", "category",
+    "price", "discounted_price", "is_sold_out", "preparation_time",
+    "calories", "protein", "carbs", "fat",
+    "spicy_level", "allow_customization"
+]
+
 
 @frappe.whitelist(allow_guest=True)
 def get_menu(table_code=None, branch=None, language="ar"):
@@ -33,56 +78,20 @@ def get_menu(table_code=None, branch=None, language="ar"):
                 return {"success": False, "message": _("Invalid table code")}
             branch = table_info.get("branch")
         
-        # Get restaurant settings
-        settings = frappe.get_single("Restaurant Settings")
+        payload, menu_etag = get_menu_payload(branch, language)
         
-        # Get menu categories
-        categories = frappe.get_all(
-            "Menu Category",
-            filters={
-                "is_active": 1,
-                "branch": ["in", [branch, None, ""]] if branch else None
-            },
-            fields=[
-                "name", "category_name", "category_name_ar",
-                "description", "description_ar", "image",
-                "display_order", "parent_category"
-            ],
-            order_by="display_order asc"
-        )
-        
-        # Get menu items for each category
-        menu_data = []
-        for category in categories:
-            items = get_category_items(category.name, branch, language)
-            
-            menu_data.append({
-                "name": category.name,
-                "title": category.category_name_ar if language == "ar" else category.category_name,
-                "description": category.description_ar if language == "ar" else category.description,
-                "image": category.image,
-                "display_order": category.display_order,
-                "parent_category": category.parent_category,
-                "items": items
-            })
+        # Let repeat scans of the same table revalidate instead of re-downloading
+        etag = '"{}"'.format(hash_payload({"menu": menu_etag, "table": table_info}))
+        response_headers = getattr(frappe.local, "response_headers", None)
+        if response_headers is not None:
+            response_headers["ETag"] = etag
+        if frappe.get_request_header("If-None-Match") == etag:
+            frappe.local.response["http_status_code"] = 304
+            return None
         
         return {
             "success": True,
-            "data": {
-                "table": table_info,
-                "branch": branch,
-                "language": language,
-                "currency": frappe.defaults.get_global_default("currency"),
-                "currency_symbol": get_currency_symbol(),
-                "categories": menu_data,
-                "settings": {
-                    "enable_call_waiter": getattr(settings, "enable_waiter_calls", False),
-                    "enable_online_payment": getattr(settings, "enable_online_payment", 0),
-                    "min_order_amount": getattr(settings, "min_order_amount", 0),
-                    "service_charge_percent": getattr(settings, "service_charge_percent", 0),
-                    "vat_percent": getattr(settings, "vat_percent", 15),
-                }
-            }
+            "data": {"table": table_info, **payload}
         }
         
     except Exception as e:
@@ -90,181 +99,391 @@ def get_menu(table_code=None, branch=None, language="ar"):
         return {"success": False, "message": _("Error loading menu")}
 
 
-def get_table_by_code(table_code):
-    """Get table info by QR code"""
-    table = frappe.db.get_value(
-        "Restaurant Table",
-        {"qr_code": table_code, "enabled": 1},
-        ["name", "table_number", "branch", "seating_capacity", "area"],
-        as_dict=True
+def get_menu_payload(branch=None, language="ar"):
+    """
+    Get the table-independent menu payload, cached per branch and language
+    
+    Returns:
+        tuple: (payload, etag) where etag is a hash of the payload
+    """
+    cache_key = f"{MENU_CACHE_PREFIX}{branch or ''}:{language}"
+    cached = frappe.cache().get_value(cache_key)
+    if cached is not None:
+        return cached["payload"], cached["etag"]
+    
+    payload = build_menu_payload(branch, language)
+    etag = hash_payload(payload)
+    frappe.cache().set_value(
+        cache_key, {"payload": payload, "etag": etag}, expires_in_sec=60
     )
-    return table
+    
+    for category in payload["categories"]:
+        frappe.cache().set_value(
+            f"{MENU_CATEGORY_CACHE_PREFIX}{category['name']}:{language}",
+            category["items"],
+            expires_in_sec=60
+        )
+    
+    # Warm details for the items guests are most likely to open next
+    prefetch = [
+        item["name"]
+        for category in payload["categories"]
+        for item in category["items"][:PREFETCH_ITEMS_PER_CATEGORY]
+    ]
+    if prefetch:
+        frappe.enqueue(
+            "restaurant_pos.restaurant_pos.api.menu.warm_item_details",
+            queue="short",
+            item_names=prefetch,
+            language=language
+        )
+    
+    return payload, etag
 
 
-def get_category_items(category, branch=None, language="ar"):
-    """Get menu items for a category"""
-    filters = {
-        "is_active": 1,
-        "category": category
-    }
+def hash_payload(payload):
+    """Stable short hash of a JSON-serialisable payload"""
+    return hashlib.blake2b(frappe.as_json(payload).encode(), digest_size=16).hexdigest()
+
+
+def clear_menu_cache():
+    """Drop cached menu payloads and item details for all branches and languages"""
+    frappe.cache().delete_keys(MENU_CACHE_PREFIX)
+    frappe.cache().delete_keys(MENU_CATEGORY_CACHE_PREFIX)
+    frappe.cache().delete_keys(ITEM_DETAILS_CACHE_PREFIX)
+
+
+def build_menu_payload(branch=None, language="ar"):
+    """Build categories, items and settings for the digital menu"""
+    # Get restaurant settings
+    settings = frappe.db.get_value(
+        "Restaurant Settings", None, MENU_SETTINGS_FIELDS, as_dict=True
+    ) or {}
     
-    if branch:
-        filters["branch"] = ["in", [branch, None, ""]]
+    currency_info = get_currency_info()
     
-    items = frappe.get_all(
-        "Menu Item",
-        filters=filters,
-        fields=[
-            "name", "item_code", "item_name", "item_name_ar",
-            "description", "description_ar", "image",
-            "price", "discounted_price", "is_sold_out",
-            "preparation_time", "calories",
-            "spicy_level",
-            "display_order", "allow_customization"
-        ],
-        order_by="display_order asc"
-    )
+    # Get menu categories
+    branch_condition = "AND COALESCE(branch, '') IN (%(branch)s, '')" if branch else ""
+    categories = frappe.db.sql(f"""
+        SELECT
+            name,
+            CASE WHEN %(language)s = 'ar' THEN category_name_ar ELSE category_name END AS title,
+            CASE WHEN %(language)s = 'ar' THEN description_ar ELSE description END AS description,
+            image, display_order, parent_category
+        FROM `tabMenu Category`
+        WHERE is_active = 1 {branch_condition}
+        ORDER BY display_order ASC
+    """, {"language": language, "branch": branch}, as_dict=True)
     
-    result = []
-    for item in items:
-        # Check real-time availability
-        is_available = not item.is_sold_out and check_item_availability(item.item_code, branch)
-        
-        # Get item modifiers
-        modifiers = get_item_modifiers(item.name) if item.allow_customization else []
-        
-        # Get dietary tags from child table
-        dietary_tags = get_item_dietary_tags(item.name)
+    # Get menu items for all categories in one query
+    items_by_category = get_items_by_category([c.name for c in categories], language)
+    
+    # Format every item in one pass so modifier, tag and stock lookups run once
+    warehouse = get_branch_warehouse(branch) if branch else None
+    all_items = [item for items in items_by_category.values() for item in items]
+    formatted_by_category = defaultdict(list)
+    for item, entry in zip(all_items, format_menu_items(all_items, branch, language, warehouse)):
+        formatted_by_category[item.category].append(entry)
+    
+    menu_data = []
+    for category in categories:
+        items = formatted_by_category[category.name]
         
-        result.append({
-            "name": item.name,
-            "item_code": item.item_code,
-            "title": item.item_name_ar if language == "ar" else item.item_name,
-            "description": item.description_ar if language == "ar" else item.description,
-            "image": item.image,
-            "price": flt(item.price),
-            "discounted_price": flt(item.discounted_price) if item.discounted_price else None,
-            "is_available": is_available,
-            "preparation_time": item.preparation_time,
-            "calories": item.calories,
-            "tags": {
-                "vegetarian": "vegetarian" in dietary_tags,
-                "vegan": "vegan" in dietary_tags,
-                "spicy": item.spicy_level and item.spicy_level not in ["None", "0", ""],
-                "spice_level": item.spicy_level
-            },
-            "modifiers": modifiers,
-            "allow_customization": item.allow_customization
+        menu_data.append({
+            "name": category.name,
+            "title": category.title,
+            "description": category.description,
+            "image": category.image,
+            "display_order": category.display_order,
+            "parent_category": category.parent_category,
+            "items": items
         })
     
-    return result
+    return {
+        "branch": branch,
+        "language": language,
+        "currency": currency_info["currency"],
+        "currency_symbol": currency_info["symbol"] or currency_info["currency"],
+        "categories": menu_data,
+        "settings": {
+            "enable_call_waiter": cint(settings.get("enable_waiter_calls")),
+            "enable_online_payment": cint(settings.get("enable_online_payment")),
+            "min_order_amount": flt(settings.get("min_order_amount")),
+            "service_charge_percent": flt(settings.get("service_charge_percent")),
+            "vat_percent": flt(settings.get("vat_percent", 15)),
+        }
+    }
+
+
+def get_table_by_code(table_code):
+    """Get table info by QR code, cached per code"""
+    table = frappe.cache().hget(TABLE_BY_QR_CACHE_KEY, table_code)
+    if table is None:
+        table = frappe.db.get_value(
+            "Restaurant Table",
+            {"qr_code_id": table_code},
+            ["name", "table_number", "branch", "capacity", "location"],
+            as_dict=True
+        )
+        # Unknown codes are not cached so a newly created table resolves at once
+        if table:
+            frappe.cache().hset(TABLE_BY_QR_CACHE_KEY, table_code, table)
+    return table
+
+
+def clear_table_by_code_cache(*table_codes):
+    """Drop cached table info for the given QR codes"""
+    for table_code in table_codes:
+        if table_code:
+            frappe.cache().hdel(TABLE_BY_QR_CACHE_KEY, table_code)
+
+
+def get_items_by_category(categories, language="ar"):
+    """Get active menu items for the given categories, grouped by category"""
+    items_by_category = defaultdict(list)
+    if not categories:
+        return items_by_category
+    
+    for item in frappe.db.sql(f"""
+        SELECT {MENU_ITEM_COLUMNS}
+        FROM `tabMenu Item`
+        WHERE is_active = 1 AND category IN %(categories)s
+        ORDER BY display_order ASC
+    """, {"language": language, "categories": tuple(categories)}, as_dict=True):
+        items_by_category[item.category].append(item)
+    
+    return items_by_category
+
+
+def format_menu_items(items, branch=None, language="ar", warehouse=None):
+    """Build menu payload entries for pre-fetched Menu Item rows"""
+    item_names = [item.name for item in items]
+    modifiers_by_item = get_modifiers_bulk(
+        [item.name for item in items if item.allow_customization]
+    )
+    tags_by_item = get_dietary_tags_bulk(item_names)
+    availability = check_availability_bulk(
+        [item.item_code for item in items if not item.is_sold_out], branch, warehouse
+    )
+    
+    no_tags = ()
+    
+    return [{
+        "name": item.name,
+        "item_code": item.item_code,
+        "title": item.title,
+        "description": item.description,
+        "image": item.image,
+        "price": flt(item.price),
+        "discounted_price": flt(item.discounted_price) if item.discounted_price else None,
+        "is_available": not item.is_sold_out and availability.get(item.item_code, True),
+        "preparation_time": item.preparation_time,
+        "calories": item.calories,
+        "tags": {
+            "vegetarian": "vegetarian" in tags_by_item.get(item.name, no_tags),
+            "vegan": "vegan" in tags_by_item.get(item.name, no_tags),
+            "spicy": item.spicy_level and item.spicy_level not in NO_SPICE_LEVELS,
+            "spice_level": item.spicy_level
+        },
+        "modifiers": modifiers_by_item.get(item.name, []),
+        "allow_customization": item.allow_customization
+    } for item in items]
 
 
 def get_item_dietary_tags(item_name):
     """Get dietary tags for a menu item from child table"""
+    return get_dietary_tags_bulk([item_name]).get(item_name, [])
+
+
+def get_dietary_tags_bulk(item_names):
+    """Get lowercased dietary tags for several menu items, keyed by item"""
+    tags_by_item = defaultdict(list)
+    if not item_names:
+        return tags_by_item
+    
     try:
-        tags = frappe.get_all(
+        for row in frappe.get_all(
             "Menu Item Tag",
-            filters={"parent": item_name, "parenttype": "Menu Item"},
-            fields=["tag"],
-            pluck="tag"
-        )
-        return [t.lower() for t in tags] if tags else []
+            filters={"parent": ["in", item_names], "parenttype": "Menu Item"},
+            fields=["parent", "tag"],
+            order_by="parent asc, idx asc"
+        ):
+            if row.tag:
+                tags_by_item[row.parent].append(row.tag.lower())
     except Exception:
-        return []
+        pass
+    
+    return tags_by_item
 
 
 def check_item_availability(item_code, branch=None):
     """Check if item is available based on stock"""
+    return check_availability_bulk([item_code], branch).get(item_code, True)
+
+
+def check_availability_bulk(item_codes, branch=None, warehouse=None):
+    """Check stock availability for several items at once, keyed by item code"""
+    availability = dict.fromkeys(item_codes, True)
+    item_codes = tuple(code for code in availability if code)
+    if not item_codes:
+        return availability
+    
     try:
-        # Get BOM for this item
-        bom = frappe.db.get_value("BOM", {"item": item_code, "is_active": 1, "is_default": 1}, "name")
+        # Get default BOMs for these items
+        boms = frappe.db.sql("""
+            SELECT item, name FROM `tabBOM`
+            WHERE is_active = 1 AND is_default = 1 AND item IN %(items)s
+        """, {"items": item_codes}, as_dict=True)
         
-        if not bom:
-            return True  # No BOM means always available
-        
-        # Check if all BOM items are in stock
-        bom_items = frappe.get_all(
-            "BOM Item",
-            filters={"parent": bom},
-            fields=["item_code", "qty"]
-        )
+        if not boms:
+            return availability  # No BOM means always available
         
-        warehouse = get_branch_warehouse(branch) if branch else None
+        bom_items = defaultdict(list)
+        for row in frappe.db.sql("""
+            SELECT parent, item_code, qty FROM `tabBOM Item`
+            WHERE parenttype = 'BOM' AND parent IN %(boms)s
+        """, {"boms": tuple(bom.name for bom in boms)}, as_dict=True):
+            bom_items[row.parent].append(row)
         
-        for bom_item in bom_items:
-            stock_qty = get_stock_qty(bom_item.item_code, warehouse)
-            if stock_qty < bom_item.qty:
-                return False
+        if warehouse is None and branch:
+            warehouse = get_branch_warehouse(branch)
         
-        return True
+        # Check if all BOM items are in stock
+        stock = get_stock_qty_bulk(
+            {row.item_code for rows in bom_items.values() for row in rows}, warehouse
+        )
+        for bom in boms:
+            for bom_item in bom_items[bom.name]:
+                if stock.get(bom_item.item_code, 0) < bom_item.qty:
+                    availability[bom.item] = False
+                    break
         
     except Exception:
-        return True  # Default to available on error
+        pass  # Default to available on error
+    
+    return availability
 
 
 def get_stock_qty(item_code, warehouse=None):
     """Get available stock quantity"""
-    try:
-        from erpnext.stock.utils import get_stock_balance
-        if warehouse:
-            return get_stock_balance(item_code, warehouse)
-        else:
-            return frappe.db.sql("""
-                SELECT SUM(actual_qty) FROM `tabBin` WHERE item_code = %s
-            """, item_code)[0][0] or 0
-    except Exception:
-        return 999  # Default high value on error
+    return get_stock_qty_bulk([item_code], warehouse).get(item_code, 0)
+
+
+def get_stock_qty_bulk(item_codes, warehouse=None):
+    """Get available stock quantity for several items from Bin, keyed by item code"""
+    if not item_codes:
+        return {}
+    
+    conditions = ["item_code IN %(items)s"]
+    values = {"items": tuple(item_codes)}
+    if warehouse:
+        conditions.append("warehouse = %(warehouse)s")
+        values["warehouse"] = warehouse
+    
+    where_clause = " AND ".join(conditions)
+    return {
+        item_code: flt(qty)
+        for item_code, qty in frappe.db.sql(
+            f"SELECT item_code, SUM(actual_qty) FROM `tabBin` WHERE {where_clause} GROUP BY item_code",
+            values
+        )
+    }
 
 
 def get_branch_warehouse(branch):
     """Get default warehouse for a branch"""
-    return frappe.db.get_value("Branch", branch, "default_warehouse")
+    return frappe.cache().hget(
+        "restaurant_pos:branch_warehouse", branch,
+        lambda: frappe.db.get_value("Branch", branch, "default_warehouse")
+    )
+
+
+def clear_branch_warehouse_cache(branch):
+    frappe.cache().hdel("restaurant_pos:branch_warehouse", branch)
 
 
 def get_item_modifiers(menu_item):
     """Get modifiers/options for a menu item"""
-    modifiers = frappe.get_all(
-        "Menu Item Modifier",
-        filters={"parent": menu_item},
-        fields=[
-            "modifier_name", "modifier_name_ar", "modifier_type",
-            "is_required", "min_selections", "max_selections",
-            "options"
-        ],
-        order_by="idx asc"
-    )
+    return get_modifiers_bulk([menu_item]).get(menu_item, [])
+
+
+def get_modifiers_bulk(item_names):
+    """Get modifiers with their options for several menu items, keyed by item"""
+    modifiers_by_item = defaultdict(list)
+    if not item_names:
+        return modifiers_by_item
     
-    result = []
-    for mod in modifiers:
-        # Get modifier options
-        options = frappe.get_all(
-            "Menu Modifier Option",
-            filters={"parent": mod.name},
-            fields=[
-                "option_name", "option_name_ar", 
-                "additional_price", "is_default"
-            ],
-            order_by="idx asc"
-        )
-        
-        result.append({
-            "name": mod.modifier_name,
-            "name_ar": mod.modifier_name_ar,
-            "type": mod.modifier_type,  # single, multiple
-            "is_required": mod.is_required,
-            "min_selections": mod.min_selections or 0,
-            "max_selections": mod.max_selections or 1,
-            "options": options
+    # Resolve links and their modifier headers in one JOIN
+    links = frappe.db.sql("""
+        SELECT
+            link.parent, link.is_required, link.min_selections, link.max_selections,
+            modifier.name AS modifier, modifier.modifier_name, modifier.modifier_name_ar,
+            modifier.selection_type
+        FROM `tabMenu Item Modifier Link` link
+        INNER JOIN `tabMenu Item Modifier` modifier ON modifier.name = link.modifier
+        WHERE link.parenttype = 'Menu Item' AND link.parent IN %(items)s
+        ORDER BY link.parent, link.idx
+    """, {"items": tuple(item_names)}, as_dict=True)
+    if not links:
+        return modifiers_by_item
+    
+    modifier_names = list({link.modifier for link in links})
+    
+    options_by_modifier = defaultdict(list)
+    for option in frappe.get_all(
+        "Menu Item Modifier Option",
+        filters={"parent": ["in", modifier_names], "parenttype": "Menu Item Modifier"},
+        fields=["parent", "option_name", "option_name_ar", "additional_price", "is_default"],
+        order_by="parent asc, idx asc"
+    ):
+        options_by_modifier[option.parent].append({
+            "option_name": option.option_name,
+            "option_name_ar": option.option_name_ar,
+            "additional_price": option.additional_price,
+            "is_default": option.is_default
+        })
+    
+    for link in links:
+        modifiers_by_item[link.parent].append({
+            "name": link.modifier_name,
+            "name_ar": link.modifier_name_ar,
+            "type": link.selection_type,  # single, multiple
+            "is_required": link.is_required,
+            "min_selections": link.min_selections or 0,
+            "max_selections": link.max_selections or 1,
+            "options": options_by_modifier[link.modifier]
         })
     
-    return result
+    return modifiers_by_item
 
 
 def get_currency_symbol():
     """Get currency symbol"""
+    currency_info = get_currency_info()
+    return currency_info["symbol"] or currency_info["currency"]
+
+
+def get_currency_info():
+    """Get the default currency and its symbol, cached in Redis"""
+    currency_info = frappe.cache().get_value(CURRENCY_INFO_CACHE_KEY)
+    if currency_info is None:
+        currency_info = _load_currency_info()
+        frappe.cache().set_value(
+            CURRENCY_INFO_CACHE_KEY, currency_info, expires_in_sec=CURRENCY_INFO_TTL
+        )
+    return currency_info
+
+
+def _load_currency_info():
     currency = frappe.defaults.get_global_default("currency")
-    return frappe.db.get_value("Currency", currency, "symbol") or currency
+    return {
+        "currency": currency,
+        "symbol": frappe.db.get_value("Currency", currency, "symbol") if currency else None
+    }
+
+
+def clear_currency_info_cache():
+    frappe.cache().delete_value(CURRENCY_INFO_CACHE_KEY)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -280,48 +499,7 @@ def get_item_details(item_name, language="ar"):
         dict: Detailed item information
     """
     try:
-        item = frappe.get_doc("Menu Item", item_name)
-        
-        # Get modifiers
-        modifiers = get_item_modifiers(item_name)
-        
-        # Get related/recommended items
-        related = get_related_items(item.menu_category, item_name, language)
-        
-        return {
-            "success": True,
-            "data": {
-                "name": item.name,
-                "item_code": item.item_code,
-                "title": item.item_name_ar if language == "ar" else item.item_name,
-                "description": item.description_ar if language == "ar" else item.description,
-                "long_description": item.long_description_ar if language == "ar" else item.long_description,
-                "image": item.image,
-                "images": get_item_images(item_name),
-                "price": flt(item.price),
-                "discounted_price": flt(item.discounted_price) if item.discounted_price else None,
-                "is_available": check_item_availability(item.item_code),
-                "preparation_time": item.preparation_time,
-                "calories": item.calories,
-                "allergens": item.allergens,
-                "nutritional_info": {
-                    "calories": item.calories,
-                    "protein": item.protein,
-                    "carbs": item.carbs,
-                    "fat": item.fat,
-                },
-                "tags": {
-                    "vegetarian": item.is_vegetarian,
-                    "vegan": item.is_vegan,
-                    "spicy": item.is_spicy,
-                    "spice_level": item.spice_level,
-                    "gluten_free": item.is_gluten_free,
-                    "halal": item.is_halal,
-                },
-                "modifiers": modifiers,
-                "related_items": related
-            }
-        }
+        return {"success": True, "data": get_item_details_data(item_name, language)}
         
     except frappe.DoesNotExistError:
         return {"success": False, "message": _("Item not found")}
@@ -330,23 +508,92 @@ def get_item_details(item_name, language="ar"):
         return {"success": False, "message": _("Error loading item details")}
 
 
-def get_item_images(menu_item):
-    """Get all images for a menu item"""
-    images = frappe.get_all(
-        "Menu Item Image",
-        filters={"parent": menu_item},
-        fields=["image", "caption"],
-        order_by="idx asc"
+def get_item_details_data(item_name, language="ar"):
+    """Get the item details payload, cached per item and language"""
+    cache_key = f"{ITEM_DETAILS_CACHE_PREFIX}{item_name}:{language}"
+    data = frappe.cache().get_value(cache_key)
+    if data is None:
+        data = build_item_details(item_name, language)
+        frappe.cache().set_value(cache_key, data, expires_in_sec=60)
+    return data
+
+
+def warm_item_details(item_names, language="ar"):
+    """Background job: pre-build item details for items likely to be opened next"""
+    for item_name in item_names:
+        try:
+            get_item_details_data(item_name, language)
+        except Exception:
+            continue
+
+
+def build_item_details(item_name, language="ar"):
+    """Build the detailed payload for a menu item"""
+    item = frappe.db.get_value("Menu Item", item_name, ITEM_DETAILS_FIELDS, as_dict=True)
+    if not item:
+        raise frappe.DoesNotExistError(_("Menu Item {0} not found").format(item_name))
+    
+    # Skip lookups whose result is already implied by the item itself
+    modifiers = get_item_modifiers(item_name) if item.allow_customization else []
+    is_available = not item.is_sold_out and check_item_availability(item.item_code)
+    tags = get_item_dietary_tags(item_name)
+    allergens = frappe.get_all(
+        "Menu Item Allergen",
+        filters={"parent": item_name, "parenttype": "Menu Item"},
+        order_by="idx asc",
+        pluck="allergen"
     )
-    return images
+    
+    # Get related/recommended items
+    related = get_related_items(item.category, item_name, language)
+    
+    return {
+        "name": item.name,
+        "item_code": item.item_code,
+        "title": item.item_name_ar if language == "ar" else item.item_name,
+        "description": item.description_ar if language == "ar" else item.description,
+        "image": item.image,
+        "images": [{"image": image} for image in (item.image, item.thumbnail) if image],
+        "price": flt(item.price),
+        "discounted_price": flt(item.discounted_price) if item.discounted_price else None,
+        "is_available": is_available,
+        "preparation_time": item.preparation_time,
+        "calories": item.calories,
+        "allergens": allergens,
+        "nutritional_info": {
+            "calories": item.calories,
+            "protein": item.protein,
+            "carbs": item.carbs,
+            "fat": item.fat,
+        },
+        "tags": {
+            "vegetarian": "vegetarian" in tags,
+            "vegan": "vegan" in tags,
+            "spicy": item.spicy_level and item.spicy_level not in NO_SPICE_LEVELS,
+            "spice_level": item.spicy_level,
+            "gluten_free": "gluten free" in tags or "gluten-free" in tags,
+            "halal": "halal" in tags,
+        },
+        "modifiers": modifiers,
+        "related_items": related
+    }
 
 
 def get_related_items(category, exclude_item, language="ar", limit=4):
     """Get related items from the same category"""
+    cached = frappe.cache().get_value(f"{MENU_CATEGORY_CACHE_PREFIX}{category}:{language}")
+    if cached is not None:
+        return [{
+            "name": item["name"],
+            "title": item["title"],
+            "image": item["image"],
+            "price": item["price"]
+        } for item in cached if item["name"] != exclude_item][:limit]
+    
     items = frappe.get_all(
         "Menu Item",
         filters={
-            "menu_category": category,
+            "category": category,
             "name": ["!=", exclude_item],
             "is_active": 1
         },
@@ -354,6 +601,7 @@ def get_related_items(category, exclude_item, language="ar", limit=4):
             "name", "item_name", "item_name_ar", 
             "image", "price"
         ],
+        order_by="display_order asc",
         limit=limit
     )
     
@@ -382,36 +630,14 @@ def search_menu(query, branch=None, language="ar"):
         if not query or len(query) < 2:
             return {"success": True, "data": []}
         
-        filters = {
-            "is_active": 1
-        }
-        
-        if branch:
-            filters["branch"] = ["in", [branch, None, ""]]
-        
-        # Search in both languages
-        items = frappe.get_all(
-            "Menu Item",
-            filters=filters,
-            or_filters=[
-                ["item_name", "like", f"%{query}%"],
-                ["item_name_ar", "like", f"%{query}%"],
-                ["description", "like", f"%{query}%"],
-                ["description_ar", "like", f"%{query}%"],
-            ],
-            fields=[
-                "name", "item_code", "item_name", "item_name_ar",
-                "image", "price", "menu_category"
-            ],
-            limit=20
-        )
+        items = search_menu_items(query, branch, language=language)
         
         result = [{
             "name": item.name,
-            "title": item.item_name_ar if language == "ar" else item.item_name,
+            "title": item.title,
             "image": item.image,
             "price": flt(item.price),
-            "category": item.menu_category
+            "category": item.category
         } for item in items]
         
         return {"success": True, "data": result}
@@ -419,3 +645,41 @@ def search_menu(query, branch=None, language="ar"):
     except Exception as e:
         frappe.log_error(f"Menu Search Error: {str(e)}", "Restaurant POS")
         return {"success": False, "message": _("Search error")}
+
+
+def search_menu_items(query, branch=None, limit=20, language="ar"):
+    """Find active menu items matching query, using the FULLTEXT index on MariaDB"""
+    conditions = ["is_active = 1"]
+    values = {"limit": cint(limit), "language": language}
+    
+    if branch:
+        conditions.append("""category IN (
+            SELECT name FROM `tabMenu Category`
+            WHERE COALESCE(branch, '') IN (%(branch)s, '')
+        )""")
+        values["branch"] = branch
+    
+    terms = FULLTEXT_OPERATORS.sub(" ", query).split()
+    if frappe.db.db_type == "mariadb" and terms:
+        # Every term must match as a word prefix
+        conditions.append(
+            "MATCH(item_name, item_name_ar, description, description_ar) "
+            "AGAINST (%(search)s IN BOOLEAN MODE)"
+        )
+        values["search"] = " ".join(f"+{term}*" for term in terms)
+    else:
+        conditions.append("""(
+            item_name LIKE %(like)s OR item_name_ar LIKE %(like)s
+            OR description LIKE %(like)s OR description_ar LIKE %(like)s
+        )""")
+        values["like"] = f"%{query}%"
+    
+    where_clause = " AND ".join(conditions)
+    return frappe.db.sql(
+        f"""SELECT name, item_code,
+            CASE WHEN %(language)s = 'ar' THEN item_name_ar ELSE item_name END AS title,
+            image, price, category
+        FROM `tabMenu Item` WHERE {where_clause} LIMIT %(limit)s""",
+        values,
+        as_dict=True
+    )
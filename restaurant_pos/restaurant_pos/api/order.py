@@ -6,11 +6,36 @@ Order API - Public endpoints for placing orders
 These APIs are accessible without login (guest access)
 """
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.utils import cint, flt, now_datetime, random_string
+from frappe.utils.caching import request_cache
 import json
 
+from restaurant_pos.restaurant_pos.api.menu import check_availability_bulk
+from restaurant_pos.restaurant_pos.doctype.kitchen_order.kitchen_order import insert_kitchen_order
+from restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order import update_table_order_summary
+from restaurant_pos.restaurant_pos.utils import validate_header_mandatory
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORDER_CHARGES_CACHE_KEY = "restaurant_pos:order_charges"
+ORDER_MENU_ITEMS_CACHE_KEY = "restaurant_pos:order_menu_items"
+
+# Item statuses that count towards order progress
+COMPLETED_ITEM_STATUSES = frozenset(("Ready", "Served"))
+
+# Restaurant Order Item columns written by bulk_insert_order_items
+ORDER_ITEM_FIELDS = [
+    "menu_item", "item_name", "item_name_ar", "qty", "rate", "amount",
+    "tax_rate", "status", "modifiers", "special_instructions"
+]
+
 
 @frappe.whitelist(allow_guest=True)
 def place_order(table_code, items, customer_name=None, customer_phone=None, 
@@ -50,7 +75,7 @@ def place_order(table_code, items, customer_name=None, customer_phone=None,
         
         # Parse items if string
         if isinstance(items, str):
-            items = json.loads(items)
+            items = loads_json(items)
         
         if not items:
             return {"success": False, "message": _("No items in order")}
@@ -75,15 +100,20 @@ def place_order(table_code, items, customer_name=None, customer_phone=None,
         if item_errors:
             return {"success": False, "message": item_errors[0], "errors": item_errors}
         
+        if not validated_items:
+            return {"success": False, "message": _("No items in order")}
+        
+        now = now_datetime()
+        
         # Get or create table session
-        session = get_or_create_table_session(table.name, customer_name, customer_phone)
+        session = get_or_create_table_session(table.name, customer_name, customer_phone, now=now)
         
         # Calculate totals
         subtotal = sum(item["total"] for item in validated_items)
-        settings = frappe.get_single("Restaurant Settings")
+        charges = get_order_charge_rates()
         
-        service_charge = flt(subtotal * (settings.service_charge_percent or 0) / 100)
-        vat = flt((subtotal + service_charge) * (settings.vat_percent or 15) / 100)
+        service_charge = flt(subtotal * charges.service_charge_percent / 100)
+        vat = flt((subtotal + service_charge) * charges.vat_percent / 100)
         grand_total = subtotal + service_charge + vat
         
         # Create the order
@@ -95,50 +125,42 @@ def place_order(table_code, items, customer_name=None, customer_phone=None,
         order.order_type = order_type
         order.customer_name = customer_name
         order.customer_phone = customer_phone
-        order.notes = notes
+        order.special_instructions = notes
         order.language = language
         order.status = "Draft"
         
         # Financials
         order.subtotal = subtotal
         order.service_charge = service_charge
-        order.service_charge_percent = settings.service_charge_percent or 0
+        order.service_charge_percent = charges.service_charge_percent
         order.vat = vat
-        order.vat_percent = settings.vat_percent or 15
+        order.vat_percent = charges.vat_percent
         order.grand_total = grand_total
         
-        # Add items
-        max_prep_time = 0
-        for item in validated_items:
-            order.append("items", {
-                "menu_item": item["menu_item"],
-                "item_code": item["item_code"],
-                "item_name": item["item_name"],
-                "item_name_ar": item["item_name_ar"],
-                "qty": item["qty"],
-                "rate": item["rate"],
-                "amount": item["total"],
-                "modifiers": json.dumps(item.get("modifiers", [])),
-                "special_instructions": item.get("notes", ""),
-                "kitchen_station": item["kitchen_station"],
-                "preparation_time": item["preparation_time"],
-                "status": "Pending"
-            })
-            
-            if item["preparation_time"] > max_prep_time:
-                max_prep_time = item["preparation_time"]
-        
+        max_prep_time = max(item["preparation_time"] for item in validated_items)
         order.estimated_preparation_time = max_prep_time
-        order.insert(ignore_permissions=True)
-        
-        # Create Kitchen Orders (KOT) by station
-        create_kitchen_orders(order)
         
-        # Send real-time notification to kitchen
-        notify_kitchen_new_order(order)
+        # Insert the header alone; item rows are bulk-inserted below, so only
+        # the items table is exempt from the required-field check
+        validate_header_mandatory(order)
+        order.flags.ignore_mandatory = True
+        order.insert(ignore_permissions=True)
         
-        # Send notification to waiters
-        notify_waiters_new_order(order)
+        for item in validated_items:
+            order.append("items", get_order_item_row(item))
+        
+        order.calculate_totals()
+        bulk_insert_order_items(order.items, now=now)
+        order.db_update()
+        order.update_table_status()
+        
+        # KOTs and staff notifications do not affect the response
+        frappe.enqueue(
+            "restaurant_pos.restaurant_pos.api.order.process_new_order",
+            queue="short",
+            enqueue_after_commit=True,
+            order_name=order.name
+        )
         
         frappe.db.commit()
         
@@ -167,27 +189,169 @@ def place_order(table_code, items, customer_name=None, customer_phone=None,
         return {"success": False, "message": _("Error placing order. Please try again.")}
 
 
+def get_order_item_row(item):
+    """Map a validated order item to Restaurant Order Item values"""
+    return {
+        "menu_item": item["menu_item"],
+        "item_name": item["item_name"],
+        "item_name_ar": item["item_name_ar"],
+        "qty": item["qty"],
+        "rate": item["rate"],
+        "amount": item["total"],
+        "modifiers": dumps_json(item.get("modifiers", [])),
+        "special_instructions": item.get("notes", ""),
+        "status": "Pending"
+    }
+
+
+def bulk_insert_order_items(items, now=None):
+    """Insert unsaved Restaurant Order Item rows with a single INSERT"""
+    now = now or now_datetime()
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx"
+    ] + ORDER_ITEM_FIELDS
+    
+    values = []
+    for item in items:
+        item.name = frappe.generate_hash(length=10)
+        # get_valid_dict applies column types, e.g. empty numbers become 0
+        row = item.get_valid_dict(convert_dates_to_str=True)
+        values.append([
+            item.name, now, now, user, user, cint(item.docstatus),
+            item.parent, item.parenttype, item.parentfield, item.idx
+        ] + [row.get(fieldname) for fieldname in ORDER_ITEM_FIELDS])
+    
+    frappe.db.bulk_insert("Restaurant Order Item", fields, values)
+
+
+def update_order_totals(order):
+    """
+    Recompute order totals from its item rows and write them in one UPDATE
+    
+    Mirrors RestaurantOrder.calculate_totals without loading the document.
+    """
+    totals = frappe.db.sql("""
+        SELECT
+            COUNT(*) AS items_count,
+            COALESCE(SUM(qty), 0) AS total_qty,
+            COALESCE(SUM(amount), 0) AS subtotal,
+            COALESCE(SUM(amount * tax_rate / 100), 0) AS tax_amount
+        FROM `tabRestaurant Order Item`
+        WHERE parent = %s AND parenttype = 'Restaurant Order'
+    """, order.name, as_dict=True)[0]
+    
+    subtotal = flt(totals.subtotal)
+    service_charge = flt(subtotal * get_order_charge_rates().service_charge_percent / 100)
+    totals.update({
+        "subtotal": subtotal,
+        "service_charge": service_charge,
+        "grand_total": (
+            subtotal + flt(totals.tax_amount) + service_charge
+            + flt(order.tip_amount) - flt(order.discount_amount)
+        )
+    })
+    
+    frappe.db.set_value("Restaurant Order", order.name, {
+        "total_qty": totals.total_qty,
+        "subtotal": subtotal,
+        "tax_amount": totals.tax_amount,
+        "service_charge": service_charge,
+        "grand_total": totals.grand_total
+    })
+    update_table_order_summary(order.name, {"grand_total": totals.grand_total})
+    
+    return totals
+
+
+def get_order_menu_items(names):
+    """Get the Menu Item fields needed to price an order, keyed by name"""
+    # Look up only the requested items; hget keeps str field names
+    cache = frappe.cache()
+    menu_items = {}
+    for name in set(names):
+        row = cache.hget(ORDER_MENU_ITEMS_CACHE_KEY, name)
+        if row is not None:
+            menu_items[name] = row
+    
+    # Fetch all cache misses in one query
+    missing = tuple({name for name in names if name not in menu_items})
+    if missing:
+        for row in frappe.db.sql("""
+            SELECT name, item_code, item_name, item_name_ar, price,
+                is_active, kitchen_station, preparation_time
+            FROM `tabMenu Item`
+            WHERE name IN %(names)s
+        """, {"names": missing}, as_dict=True):
+            menu_items[row.name] = row
+            cache.hset(ORDER_MENU_ITEMS_CACHE_KEY, row.name, row)
+    
+    return menu_items
+
+
+def clear_order_menu_items_cache():
+    """Drop cached Menu Item pricing data after a menu item changes"""
+    frappe.cache().delete_value(ORDER_MENU_ITEMS_CACHE_KEY)
+
+
+def dumps_json(obj):
+    """Serialize to a JSON string, using orjson when it is available"""
+    if orjson:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def loads_json(data):
+    """Parse a JSON string, using orjson when it is available"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def get_order_charge_rates():
+    """Get service charge and VAT percentages from Restaurant Settings, cached briefly"""
+    charges = frappe.cache().get_value(ORDER_CHARGES_CACHE_KEY)
+    if charges is None:
+        settings = frappe.db.get_value(
+            "Restaurant Settings", None,
+            ["service_charge_percent", "vat_percent"],
+            as_dict=True
+        ) or {}
+        charges = frappe._dict({
+            "service_charge_percent": flt(settings.get("service_charge_percent")),
+            "vat_percent": flt(settings.get("vat_percent")) or 15
+        })
+        frappe.cache().set_value(ORDER_CHARGES_CACHE_KEY, charges, expires_in_sec=60)
+    return charges
+
+
+def clear_order_charges_cache():
+    """Drop cached charge rates after Restaurant Settings change"""
+    frappe.cache().delete_value(ORDER_CHARGES_CACHE_KEY)
+
+
 def validate_order_items(items, branch=None):
     """Validate order items and calculate totals"""
     validated = []
     errors = []
     
+    items = [item for item in items if cint(item.get("qty", 1)) >= 1]
+    
+    names = {item.get("item") or item.get("menu_item") for item in items}
+    names.discard(None)
+    menu_items = get_order_menu_items(names)
+    
+    availability = check_availability_bulk(
+        [row.item_code for row in menu_items.values() if row.is_active], branch
+    )
+    
     for item in items:
         menu_item_name = item.get("item") or item.get("menu_item")
         qty = cint(item.get("qty", 1))
         modifiers = item.get("modifiers", [])
         
-        if qty < 1:
-            continue
-        
-        # Get menu item details
-        menu_item = frappe.db.get_value(
-            "Menu Item",
-            menu_item_name,
-            ["name", "item_code", "item_name", "item_name_ar", "price", 
-             "is_active", "kitchen_station", "preparation_time"],
-            as_dict=True
-        )
+        menu_item = menu_items.get(menu_item_name)
         
         if not menu_item:
             errors.append(f"Item not found: {menu_item_name}")
@@ -198,18 +362,13 @@ def validate_order_items(items, branch=None):
             continue
         
         # Check availability
-        from restaurant_pos.restaurant_pos.api.menu import check_item_availability
-        if not check_item_availability(menu_item.item_code, branch):
+        if not availability.get(menu_item.item_code, True):
             errors.append(f"Item out of stock: {menu_item.item_name}")
             continue
         
         # Calculate price with modifiers
         base_price = flt(menu_item.price)
-        modifier_price = 0
-        
-        for mod in modifiers:
-            if mod.get("additional_price"):
-                modifier_price += flt(mod["additional_price"])
+        modifier_price = sum(flt(mod.get("additional_price")) for mod in modifiers)
         
         unit_price = base_price + modifier_price
         total = unit_price * qty
@@ -231,8 +390,11 @@ def validate_order_items(items, branch=None):
     return validated, errors
 
 
-def get_or_create_table_session(table, customer_name=None, customer_phone=None):
+def get_or_create_table_session(table, customer_name=None, customer_phone=None, now=None):
     """Get existing session or create new one for a table"""
+    # Lock the table row so concurrent requests serialize on the session check
+    frappe.db.get_value("Restaurant Table", table, "current_session", for_update=True)
+    
     # Check for active session
     existing = frappe.db.get_value(
         "Table Session",
@@ -249,7 +411,7 @@ def get_or_create_table_session(table, customer_name=None, customer_phone=None):
     session.customer_name = customer_name
     session.customer_phone = customer_phone
     session.status = "Ordering"
-    session.started_at = now_datetime()
+    session.started_at = now or now_datetime()
     session.insert(ignore_permissions=True)
     
     # Update table with current session
@@ -258,16 +420,32 @@ def get_or_create_table_session(table, customer_name=None, customer_phone=None):
     return session.name
 
 
+def process_new_order(order_name):
+    """Background job: create KOTs for a new order and notify kitchen and waiters"""
+    order = frappe.get_doc("Restaurant Order", order_name)
+    
+    # Create Kitchen Orders (KOT) by station
+    create_kitchen_orders(order)
+    
+    # Send real-time notification to kitchen and waiters
+    notify_new_order(order, len(order.items))
+
+
 def create_kitchen_orders(order):
     """Create Kitchen Order Tickets (KOT) grouped by kitchen station"""
+    # Kitchen station is not stored on the order line, read it from the menu items
+    stations = dict(frappe.get_all(
+        "Menu Item",
+        filters={"name": ["in", list({item.menu_item for item in order.items})]},
+        fields=["name", "kitchen_station"],
+        as_list=True
+    ))
+    
     # Group items by kitchen station
-    station_items = {}
+    station_items = defaultdict(list)
     
     for item in order.items:
-        station = item.kitchen_station or "Main Kitchen"
-        if station not in station_items:
-            station_items[station] = []
-        station_items[station].append(item)
+        station_items[stations.get(item.menu_item) or "Main Kitchen"].append(item)
     
     # Create KOT for each station
     for station, items in station_items.items():
@@ -280,10 +458,10 @@ def create_kitchen_orders(order):
         kot.order_type = order.order_type
         kot.status = "Pending"
         kot.priority = "Normal"
-        kot.notes = order.notes
+        kot.notes = order.special_instructions
         
-        for item in items:
-            kot.append("items", {
+        insert_kitchen_order(kot, [
+            {
                 "order_item": item.name,
                 "menu_item": item.menu_item,
                 "item_name": item.item_name,
@@ -292,42 +470,36 @@ def create_kitchen_orders(order):
                 "modifiers": item.modifiers,
                 "special_instructions": item.special_instructions,
                 "status": "Pending"
-            })
-        
-        kot.insert(ignore_permissions=True)
-
-
-def notify_kitchen_new_order(order):
-    """Send real-time notification to kitchen displays"""
-    frappe.publish_realtime(
-        event="restaurant:new_order",
-        message={
-            "order_id": order.name,
-            "order_number": order.order_number,
-            "table_number": order.table_number,
-            "order_type": order.order_type,
-            "items_count": len(order.items),
-            "branch": order.branch,
-            "timestamp": str(now_datetime())
-        },
-        room=f"kitchen:{order.branch}"
-    )
+            }
+            for item in items
+        ])
 
 
-def notify_waiters_new_order(order):
-    """Send notification to waiters"""
-    frappe.publish_realtime(
-        event="restaurant:new_order",
-        message={
-            "order_id": order.name,
-            "order_number": order.order_number,
-            "table_number": order.table_number,
-            "customer_name": order.customer_name,
-            "grand_total": order.grand_total,
-            "branch": order.branch,
-        },
-        room=f"waiters:{order.branch}"
-    )
+def notify_new_order(order, items_count, notify_waiters=True):
+    """Send one new-order payload to kitchen displays and, optionally, waiters"""
+    message = {
+        "order_id": order.name,
+        "order_number": order.name,
+        "table_number": order.table_number,
+        "order_type": order.order_type,
+        "items_count": items_count,
+        "customer_name": order.customer_name,
+        "grand_total": order.grand_total,
+        "branch": order.branch,
+        "timestamp": str(now_datetime())
+    }
+    
+    rooms = [f"kitchen:{order.branch}"]
+    if notify_waiters:
+        rooms.append(f"waiters:{order.branch}")
+    
+    for room in rooms:
+        frappe.publish_realtime(
+            event="restaurant:new_order",
+            message=message,
+            room=room,
+            after_commit=True
+        )
 
 
 @frappe.whitelist(allow_guest=True)
@@ -336,56 +508,58 @@ def get_order_status(order_id):
     Get the current status of an order
     
     Args:
-        order_id: Order ID or order number
+        order_id: Order ID (the naming series value doubles as the order number)
     
     Returns:
         dict: Order status and details
     """
     try:
-        # Find order by ID or order number
-        order = None
-        if frappe.db.exists("Restaurant Order", order_id):
-            order = frappe.get_doc("Restaurant Order", order_id)
-        else:
-            order_name = frappe.db.get_value(
-                "Restaurant Order", 
-                {"order_number": order_id}, 
-                "name"
-            )
-            if order_name:
-                order = frappe.get_doc("Restaurant Order", order_name)
+        order = frappe.db.get_value(
+            "Restaurant Order",
+            order_id,
+            ["name", "table_number", "status", "grand_total", "payment_status", "creation"],
+            as_dict=True
+        )
         
         if not order:
             return {"success": False, "message": _("Order not found")}
         
-        # Get item statuses
+        items = frappe.get_all(
+            "Restaurant Order Item",
+            filters={"parent": order.name, "parenttype": "Restaurant Order"},
+            fields=["item_name", "item_name_ar", "qty", "status"],
+            order_by="idx asc"
+        )
+        
+        # Get item statuses, counting finished items in the same pass
         items_status = []
-        for item in order.items:
+        completed_items = 0
+        for item in items:
             items_status.append({
                 "item_name": item.item_name_ar or item.item_name,
                 "qty": item.qty,
                 "status": item.status,
                 "status_text": get_status_text(item.status)
             })
+            if item.status in COMPLETED_ITEM_STATUSES:
+                completed_items += 1
         
         # Calculate progress
-        total_items = len(order.items)
-        completed_items = len([i for i in order.items if i.status in ["Ready", "Served"]])
-        progress = int((completed_items / total_items) * 100) if total_items > 0 else 0
+        total_items = len(items)
+        progress = completed_items * 100 // total_items if total_items else 0
         
         return {
             "success": True,
             "data": {
                 "order_id": order.name,
-                "order_number": order.order_number,
+                "order_number": order.name,
                 "table_number": order.table_number,
                 "status": order.status,
                 "status_text": get_status_text(order.status),
                 "progress": progress,
-                "estimated_time": order.estimated_preparation_time,
                 "items": items_status,
                 "grand_total": order.grand_total,
-                "is_paid": order.is_paid,
+                "is_paid": order.payment_status == "Paid",
                 "created_at": str(order.creation),
             }
         }
@@ -397,7 +571,14 @@ def get_order_status(order_id):
 
 def get_status_text(status):
     """Get localized status text"""
-    status_map = {
+    return get_status_text_map(frappe.local.lang).get(status, status)
+
+
+@request_cache
+def get_status_text_map(lang):
+    """Translated order status labels, built once per request and language"""
+    # _() resolves against the site's translations for the request language
+    return {
         "Draft": _("Order Received"),
         "Pending": _("Pending"),
         "Confirmed": _("Confirmed"),
@@ -407,7 +588,6 @@ def get_status_text(status):
         "Completed": _("Completed"),
         "Cancelled": _("Cancelled")
     }
-    return status_map.get(status, status)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -424,14 +604,28 @@ def add_items_to_order(order_id, items, language="ar"):
         dict: Updated order details
     """
     try:
-        order = frappe.get_doc("Restaurant Order", order_id)
+        # Lock the header so concurrent adds serialize the MAX(idx) + insert + totals sequence
+        order = frappe.db.get_value(
+            "Restaurant Order",
+            order_id,
+            [
+                "name", "status", "docstatus", "branch", "restaurant_table",
+                "table_number", "order_type", "customer_name",
+                "tip_amount", "discount_amount"
+            ],
+            as_dict=True,
+            for_update=True
+        )
+        
+        if not order:
+            return {"success": False, "message": _("Order not found")}
         
-        if order.status in ["Completed", "Cancelled", "Paid"]:
+        if order.docstatus != 0 or order.status in ["Completed", "Cancelled", "Paid"]:
             return {"success": False, "message": _("Cannot modify this order")}
         
         # Parse items
         if isinstance(items, str):
-            items = json.loads(items)
+            items = loads_json(items)
         
         # Validate new items
         validated_items, errors = validate_order_items(items, order.branch)
@@ -439,41 +633,36 @@ def add_items_to_order(order_id, items, language="ar"):
         if errors:
             return {"success": False, "message": errors[0]}
         
-        # Add items to order
-        for item in validated_items:
-            order.append("items", {
-                "menu_item": item["menu_item"],
-                "item_code": item["item_code"],
-                "item_name": item["item_name"],
-                "item_name_ar": item["item_name_ar"],
-                "qty": item["qty"],
-                "rate": item["rate"],
-                "amount": item["total"],
-                "modifiers": json.dumps(item.get("modifiers", [])),
-                "special_instructions": item.get("notes", ""),
-                "kitchen_station": item["kitchen_station"],
-                "preparation_time": item["preparation_time"],
-                "status": "Pending"
+        if not validated_items:
+            return {"success": False, "message": _("No items in order")}
+        
+        # Append the new rows after the existing ones without loading them
+        last_idx = frappe.db.sql("""
+            SELECT COALESCE(MAX(idx), 0) FROM `tabRestaurant Order Item`
+            WHERE parent = %s AND parenttype = 'Restaurant Order'
+        """, order.name)[0][0]
+        
+        bulk_insert_order_items([
+            frappe.get_doc({
+                "doctype": "Restaurant Order Item",
+                "parent": order.name,
+                "parenttype": "Restaurant Order",
+                "parentfield": "items",
+                "idx": last_idx + idx,
+                **get_order_item_row(item)
             })
+            for idx, item in enumerate(validated_items, start=1)
+        ])
         
         # Recalculate totals
-        settings = frappe.get_single("Restaurant Settings")
-        order.subtotal = sum(flt(item.amount) for item in order.items)
-        
-        service_percent = flt(getattr(settings, 'service_charge_percent', 0) or 0)
-        order.service_charge = flt(order.subtotal * service_percent / 100)
-        
-        vat_percent = flt(getattr(settings, 'vat_percent', 15) or 15)
-        order.vat = flt((order.subtotal + order.service_charge) * vat_percent / 100)
-        order.grand_total = order.subtotal + order.service_charge + order.vat
-        
-        order.save(ignore_permissions=True)
+        totals = update_order_totals(order)
+        order.grand_total = totals.grand_total
         
         # Create new KOTs for added items
         create_kitchen_orders_for_items(order, validated_items)
         
         # Notify kitchen
-        notify_kitchen_new_order(order)
+        notify_new_order(order, totals.items_count, notify_waiters=False)
         
         frappe.db.commit()
         
@@ -483,7 +672,7 @@ def add_items_to_order(order_id, items, language="ar"):
             "data": {
                 "order_id": order.name,
                 "grand_total": order.grand_total,
-                "items_count": len(order.items)
+                "items_count": totals.items_count
             }
         }
         
@@ -495,12 +684,9 @@ def add_items_to_order(order_id, items, language="ar"):
 def create_kitchen_orders_for_items(order, new_items):
     """Create KOTs for newly added items"""
     # Group by station
-    station_items = {}
+    station_items = defaultdict(list)
     for item in new_items:
-        station = item["kitchen_station"] or "Main Kitchen"
-        if station not in station_items:
-            station_items[station] = []
-        station_items[station].append(item)
+        station_items[item["kitchen_station"] or "Main Kitchen"].append(item)
     
     # Create or append to existing KOT
     for station, items in station_items.items():
@@ -515,15 +701,15 @@ def create_kitchen_orders_for_items(order, new_items):
         kot.priority = "Normal"
         kot.is_additional = 1
         
-        for item in items:
-            kot.append("items", {
+        insert_kitchen_order(kot, [
+            {
                 "menu_item": item["menu_item"],
                 "item_name": item["item_name"],
                 "item_name_ar": item["item_name_ar"],
                 "qty": item["qty"],
-                "modifiers": json.dumps(item.get("modifiers", [])),
+                "modifiers": dumps_json(item.get("modifiers", [])),
                 "special_instructions": item.get("notes", ""),
                 "status": "Pending"
-            })
-        
-        kot.insert(ignore_permissions=True)
+            }
+            for item in items
+        ])
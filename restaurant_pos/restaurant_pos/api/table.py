@@ -7,7 +7,7 @@ Table API - Public endpoints for table management
 
 import frappe
 from frappe import _
-from frappe.utils import now_datetime
+from frappe.utils import flt, now_datetime
 
 
 @frappe.whitelist(allow_guest=True)
@@ -22,43 +22,41 @@ def get_table_session(table_code):
         dict: Table and session information
     """
     try:
-        # Get table by QR code
-        table = frappe.db.get_value(
-            "Restaurant Table",
-            {"qr_code": table_code, "enabled": 1},
-            ["name", "table_number", "branch", "seating_capacity", 
-             "area", "current_session", "status"],
-            as_dict=True
-        )
+        # Table, its branch and its open session in one query
+        table = frappe.db.sql("""
+            SELECT
+                t.name, t.table_number, t.branch, t.capacity, t.location, t.status,
+                b.branch AS branch_name,
+                s.name AS session, s.status AS session_status, s.started_at,
+                MAX(o.customer_name) AS customer_name,
+                COUNT(o.name) AS orders_count
+            FROM `tabRestaurant Table` t
+            LEFT JOIN `tabBranch` b ON b.name = t.branch
+            LEFT JOIN `tabTable Session` s
+                ON s.name = t.current_session AND s.status IN ('Active', 'Ordering')
+            LEFT JOIN `tabRestaurant Order` o
+                ON o.table_session = s.name AND o.status != 'Cancelled'
+            WHERE t.qr_code_id = %s
+            GROUP BY t.name
+        """, table_code, as_dict=True)
         
         if not table:
             return {"success": False, "message": _("Invalid QR code")}
         
-        # Get branch info
-        branch_info = frappe.db.get_value(
-            "Branch",
-            table.branch,
-            ["branch_name", "address", "phone"],
-            as_dict=True
-        ) if table.branch else {}
+        table = table[0]
+        
+        branch_info = {"branch_name": table.branch_name} if table.branch else {}
         
         # Get active session info
         session_info = None
-        if table.current_session:
-            session = frappe.db.get_value(
-                "Table Session",
-                table.current_session,
-                ["name", "status", "customer_name", "started_at", "total_orders"],
-                as_dict=True
-            )
-            if session and session.status in ["Active", "Ordering"]:
-                session_info = {
-                    "session_id": session.name,
-                    "status": session.status,
-                    "customer_name": session.customer_name,
-                    "started_at": str(session.started_at),
-                    "orders_count": session.total_orders or 0
-                }
+        if table.session:
+            session_info = {
+                "session_id": table.session,
+                "status": table.session_status,
+                "customer_name": table.customer_name,
+                "started_at": str(table.started_at),
+                "orders_count": table.orders_count
+            }
         
         # Get pending orders for this table
         pending_orders = []
@@ -69,12 +67,12 @@ def get_table_session(table_code):
                     "table_session": session_info["session_id"],
                     "status": ["not in", ["Completed", "Cancelled", "Paid"]]
                 },
-                fields=["name", "order_number", "status", "grand_total", "creation"],
+                fields=["name", "status", "grand_total", "creation"],
                 order_by="creation desc"
             )
             pending_orders = [{
                 "order_id": o.name,
-                "order_number": o.order_number,
+                "order_number": o.name,
                 "status": o.status,
                 "total": o.grand_total,
                 "created": str(o.creation)
@@ -86,8 +84,8 @@ def get_table_session(table_code):
                 "table": {
                     "id": table.name,
                     "number": table.table_number,
-                    "capacity": table.seating_capacity,
-                    "area": table.area,
+                    "capacity": table.capacity,
+                    "area": table.location,
                     "status": table.status
                 },
                 "branch": branch_info,
@@ -126,6 +124,8 @@ def call_waiter(table_code, reason=None):
         if not table:
             return {"success": False, "message": _("Invalid table")}
         
+        now = now_datetime()
+        
         # Create waiter call record
         call = frappe.new_doc("Waiter Call")
         call.restaurant_table = table.name
@@ -133,34 +133,23 @@ def call_waiter(table_code, reason=None):
         call.branch = table.branch
         call.call_type = reason
         call.status = "Pending"
-        call.called_at = now_datetime()
+        call.called_at = now
         call.insert(ignore_permissions=True)
         
-        # Send real-time notification
-        frappe.publish_realtime(
-            event="restaurant:call_waiter",
-            message={
-                "call_id": call.name,
-                "table_number": table.table_number,
-                "branch": table.branch,
-                "reason": reason,
-                "timestamp": str(now_datetime())
-            },
-            room=f"waiters:{table.branch}"
-        )
-        
-        # Also send to restaurant manager room
-        frappe.publish_realtime(
-            event="restaurant:call_waiter",
-            message={
-                "call_id": call.name,
-                "table_number": table.table_number,
-                "branch": table.branch,
-                "reason": reason,
-                "timestamp": str(now_datetime())
-            },
-            room=f"manager:{table.branch}"
-        )
+        # Send real-time notification to waiters and the restaurant manager
+        message = {
+            "call_id": call.name,
+            "table_number": table.table_number,
+            "branch": table.branch,
+            "reason": reason,
+            "timestamp": str(now)
+        }
+        for room in (f"waiters:{table.branch}", f"manager:{table.branch}"):
+            frappe.publish_realtime(
+                event="restaurant:call_waiter",
+                message=message,
+                room=room
+            )
         
         frappe.db.commit()
         
@@ -204,25 +193,24 @@ def request_bill(table_code, payment_method=None):
         if not table.current_session:
             return {"success": False, "message": _("No active session")}
         
-        # Get all orders for this session
-        orders = frappe.get_all(
-            "Restaurant Order",
-            filters={
-                "table_session": table.current_session,
-                "status": ["not in", ["Cancelled"]]
-            },
-            fields=["name", "subtotal", "service_charge", "vat", "grand_total", "is_paid"]
-        )
+        # Total all orders for this session in the database
+        totals = frappe.db.sql("""
+            SELECT
+                COUNT(*) AS orders_count,
+                COALESCE(SUM(subtotal), 0) AS subtotal,
+                COALESCE(SUM(service_charge), 0) AS service_charge,
+                COALESCE(SUM(tax_amount), 0) AS vat,
+                COALESCE(SUM(grand_total), 0) AS grand_total,
+                COALESCE(SUM(CASE WHEN payment_status = 'Paid' THEN grand_total ELSE 0 END), 0) AS paid_amount
+            FROM `tabRestaurant Order`
+            WHERE table_session = %s AND status != 'Cancelled'
+        """, table.current_session, as_dict=True)[0]
         
-        if not orders:
+        if not totals.orders_count:
             return {"success": False, "message": _("No orders found")}
         
-        # Calculate totals
-        total_subtotal = sum(o.subtotal for o in orders)
-        total_service = sum(o.service_charge for o in orders)
-        total_vat = sum(o.vat for o in orders)
-        total_amount = sum(o.grand_total for o in orders)
-        paid_amount = sum(o.grand_total for o in orders if o.is_paid)
+        total_amount = flt(totals.grand_total)
+        paid_amount = flt(totals.paid_amount)
         
         # Send notification to cashier
         frappe.publish_realtime(
@@ -243,10 +231,10 @@ def request_bill(table_code, payment_method=None):
             "message": _("Bill request sent"),
             "data": {
                 "table_number": table.table_number,
-                "orders_count": len(orders),
-                "subtotal": total_subtotal,
-                "service_charge": total_service,
-                "vat": total_vat,
+                "orders_count": totals.orders_count,
+                "subtotal": flt(totals.subtotal),
+                "service_charge": flt(totals.service_charge),
+                "vat": flt(totals.vat),
                 "grand_total": total_amount,
                 "paid_amount": paid_amount,
                 "balance": total_amount - paid_amount,
@@ -271,59 +259,48 @@ def get_table_status(table=None, branch=None):
     Returns:
         list: Table statuses
     """
-    filters = {"enabled": 1}
+    conditions = []
+    values = {}
     
     if table:
-        filters["name"] = table
+        conditions.append("t.name = %(table)s")
+        values["table"] = table
     if branch:
-        filters["branch"] = branch
+        conditions.append("t.branch = %(branch)s")
+        values["branch"] = branch
     
-    tables = frappe.get_all(
-        "Restaurant Table",
-        filters=filters,
-        fields=[
-            "name", "table_number", "branch", "area",
-            "seating_capacity", "status", "current_session"
-        ],
-        order_by="table_number asc"
-    )
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     
-    result = []
-    for t in tables:
-        table_info = {
-            "id": t.name,
-            "number": t.table_number,
-            "area": t.area,
-            "capacity": t.seating_capacity,
-            "status": t.status,
-            "session": None,
-            "current_order": None,
-            "total_amount": 0
-        }
-        
-        if t.current_session:
-            session = frappe.db.get_value(
-                "Table Session",
-                t.current_session,
-                ["customer_name", "started_at", "status"],
-                as_dict=True
-            )
-            if session and session.status in ["Active", "Ordering"]:
-                table_info["session"] = {
-                    "id": t.current_session,
-                    "customer": session.customer_name,
-                    "started": str(session.started_at)
-                }
-                
-                # Get total amount
-                total = frappe.db.sql("""
-                    SELECT SUM(grand_total) as total
-                    FROM `tabRestaurant Order`
-                    WHERE table_session = %s AND status != 'Cancelled'
-                """, t.current_session, as_dict=True)
-                
-                table_info["total_amount"] = total[0].total if total and total[0].total else 0
-        
-        result.append(table_info)
+    # Tables, their open session and its running total in one query
+    tables = frappe.db.sql(f"""
+        SELECT
+            t.name, t.table_number, t.location, t.capacity, t.status,
+            s.name AS session, s.started_at,
+            MAX(o.customer_name) AS customer_name,
+            COALESCE(SUM(o.grand_total), 0) AS total_amount
+        FROM `tabRestaurant Table` t
+        LEFT JOIN `tabTable Session` s
+            ON s.name = t.current_session AND s.status IN ('Active', 'Ordering')
+        LEFT JOIN `tabRestaurant Order` o
+            ON o.table_session = s.name AND o.status != 'Cancelled'
+        {where_clause}
+        GROUP BY t.name
+        ORDER BY t.table_number ASC
+    """, values, as_dict=True)
+    
+    result = [{
+        "id": t.name,
+        "number": t.table_number,
+        "area": t.location,
+        "capacity": t.capacity,
+        "status": t.status,
+        "session": {
+            "id": t.session,
+            "customer": t.customer_name,
+            "started": str(t.started_at)
+        } if t.session else None,
+        "current_order": None,
+        "total_amount": t.total_amount
+    } for t in tables]
     
     return {"success": True, "data": result}
@@ -5,10 +5,16 @@
 Waiter API - Endpoints for Waiter Operations
 """
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.utils import now_datetime
 
+from restaurant_pos.restaurant_pos.api.order import ORDER_ITEM_FIELDS
+from restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order import TABLE_ORDER_SUMMARY_FIELDS
+from restaurant_pos.restaurant_pos.utils import get_current_branch
+
 
 @frappe.whitelist()
 def get_my_tables():
@@ -19,7 +25,7 @@ def get_my_tables():
         list: Tables with current status
     """
     user = frappe.session.user
-    branch = frappe.defaults.get_user_default("branch")
+    branch = get_current_branch()
     
     tables = frappe.get_all(
         "Restaurant Table",
@@ -29,7 +35,7 @@ def get_my_tables():
         },
         fields=[
             "name", "table_number", "capacity", "status",
-            "current_order", "location"
+            "current_order", "location", *TABLE_ORDER_SUMMARY_FIELDS.values()
         ],
         order_by="table_number asc"
     )
@@ -48,20 +54,13 @@ def get_my_tables():
         }
         
         if table.current_order:
-            order = frappe.db.get_value(
-                "Restaurant Order",
-                table.current_order,
-                ["name", "status", "guest_count", "creation", "grand_total"],
-                as_dict=True
-            )
-            if order:
-                data["current_order"] = {
-                    "id": order.name,
-                    "status": order.status,
-                    "total": order.grand_total,
-                    "created_at": str(order.creation)
-                }
-                data["guests"] = order.guest_count
+            data["current_order"] = {
+                "id": table.current_order,
+                "status": table.order_status,
+                "total": table.order_grand_total,
+                "created_at": str(table.order_started_at)
+            }
+            data["guests"] = table.order_guest_count
         
         result.append(data)
     
@@ -81,7 +80,7 @@ def get_all_tables(branch=None, location=None):
         list: All tables
     """
     if not branch:
-        branch = frappe.defaults.get_user_default("branch")
+        branch = get_current_branch()
     
     filters = {"branch": branch}
     if location:
@@ -93,11 +92,13 @@ def get_all_tables(branch=None, location=None):
         fields=[
             "name", "table_number", "capacity", "status",
             "current_order", "location", "assigned_waiter",
-            "position_x", "position_y"
+            "position_x", "position_y", *TABLE_ORDER_SUMMARY_FIELDS.values()
         ],
         order_by="table_number asc"
     )
     
+    now = now_datetime()
+    
     result = []
     for table in tables:
         data = {
@@ -115,33 +116,36 @@ def get_all_tables(branch=None, location=None):
         }
         
         if table.current_order and table.status == "Occupied":
-            order = frappe.db.get_value(
-                "Restaurant Order",
-                table.current_order,
-                ["name", "status", "guest_count", "creation", "grand_total"],
-                as_dict=True
-            )
-            if order:
-                data["current_order"] = {
-                    "id": order.name,
-                    "status": order.status,
-                    "guests": order.guest_count,
-                    "total": order.grand_total,
-                    "minutes_elapsed": int(
-                        (now_datetime() - order.creation).total_seconds() / 60
-                    )
-                }
+            data["current_order"] = {
+                "id": table.current_order,
+                "status": table.order_status,
+                "guests": table.order_guest_count,
+                "total": table.order_grand_total,
+                "minutes_elapsed": int(
+                    (now - table.order_started_at).total_seconds() / 60
+                ) if table.order_started_at else 0
+            }
         
         result.append(data)
     
     return {"success": True, "data": result}
 
 
+def lock_tables(table_ids):
+    """Load tables with row locks, always in name order to avoid deadlocks"""
+    return {
+        table_id: frappe.get_doc("Restaurant Table", table_id, for_update=True)
+        for table_id in sorted(set(table_ids))
+    }
+
+
 @frappe.whitelist()
 def seat_guests(table_id, guest_count):
     """
     Seat guests at a table
     
+    Writes are committed at the end of the request, not here.
+    
     Args:
         table_id: Table ID
         guest_count: Number of guests
@@ -150,7 +154,13 @@ def seat_guests(table_id, guest_count):
         dict: Table session info
     """
     try:
-        table = frappe.get_doc("Restaurant Table", table_id)
+        # Lock the row so two waiters cannot seat the same table concurrently
+        table = frappe.db.get_value(
+            "Restaurant Table", table_id, ["status", "table_number", "branch"],
+            as_dict=True, for_update=True
+        )
+        if not table:
+            frappe.throw(_("Table {0} not found").format(table_id), frappe.DoesNotExistError)
         
         if table.status == "Occupied":
             return {
@@ -172,11 +182,10 @@ def seat_guests(table_id, guest_count):
         session.insert(ignore_permissions=True)
         
         # Update table status
-        table.status = "Occupied"
-        table.current_session = session.name
-        table.save(ignore_permissions=True)
-        
-        frappe.db.commit()
+        frappe.db.set_value("Restaurant Table", table_id, {
+            "status": "Occupied",
+            "current_session": session.name
+        })
         
         return {
             "success": True,
@@ -198,6 +207,8 @@ def transfer_table(from_table, to_table):
     """
     Transfer guests and order to another table
     
+    Writes are committed at the end of the request, not here.
+    
     Args:
         from_table: Source table ID
         to_table: Destination table ID
@@ -206,8 +217,9 @@ def transfer_table(from_table, to_table):
         dict: Confirmation
     """
     try:
-        source = frappe.get_doc("Restaurant Table", from_table)
-        dest = frappe.get_doc("Restaurant Table", to_table)
+        tables = lock_tables([from_table, to_table])
+        source = tables[from_table]
+        dest = tables[to_table]
         
         if dest.status == "Occupied":
             return {
@@ -243,6 +255,8 @@ def transfer_table(from_table, to_table):
         dest.status = "Occupied"
         dest.current_session = source.current_session
         dest.current_order = source.current_order
+        for field in TABLE_ORDER_SUMMARY_FIELDS.values():
+            dest.set(field, source.get(field))
         dest.save(ignore_permissions=True)
         
         source.status = "Available"
@@ -250,8 +264,6 @@ def transfer_table(from_table, to_table):
         source.current_order = None
         source.save(ignore_permissions=True)
         
-        frappe.db.commit()
-        
         return {
             "success": True,
             "message": _("Table transferred successfully"),
@@ -271,6 +283,8 @@ def merge_tables(table_ids, primary_table):
     """
     Merge multiple tables into one
     
+    All writes are committed together once the merge is complete.
+    
     Args:
         table_ids: List of table IDs to merge
         primary_table: Primary table ID
@@ -282,55 +296,70 @@ def merge_tables(table_ids, primary_table):
         if isinstance(table_ids, str):
             table_ids = frappe.parse_json(table_ids)
         
-        primary = frappe.get_doc("Restaurant Table", primary_table)
+        # Lock every involved table before reading its order
+        tables = lock_tables([*table_ids, primary_table])
+        primary = tables[primary_table]
         
         # Collect all orders
-        orders_to_merge = []
-        for tid in table_ids:
-            if tid == primary_table:
-                continue
-            table = frappe.get_doc("Restaurant Table", tid)
-            if table.current_order:
-                orders_to_merge.append(table.current_order)
+        orders_to_merge = [
+            tables[tid].current_order
+            for tid in table_ids
+            if tid != primary_table and tid in tables and tables[tid].current_order
+        ]
         
         # Merge orders into primary
         if primary.current_order and orders_to_merge:
             primary_order = frappe.get_doc("Restaurant Order", primary.current_order)
+            now = now_datetime()
             
-            for order_name in orders_to_merge:
-                order = frappe.get_doc("Restaurant Order", order_name)
-                
-                # Transfer items
-                for item in order.items:
-                    new_item = primary_order.append("items", {})
-                    for field in item.as_dict():
-                        if field not in ["name", "parent", "parentfield", "parenttype", "idx"]:
-                            new_item.set(field, item.get(field))
+            # Lock each merged order (in name order) and check it can still be merged;
+            # the row lock held until commit is the guard, so the UPDATE needs no version check
+            for order_name in sorted(orders_to_merge):
+                order = frappe.db.get_value(
+                    "Restaurant Order", order_name, ["status", "docstatus"],
+                    as_dict=True, for_update=True
+                )
+                if (
+                    not order
+                    or order.docstatus == 2
+                    or order.status in ("Paid", "Cancelled", "Merged")
+                ):
+                    frappe.throw(
+                        _("Order {0} was changed by another user").format(order_name),
+                        frappe.TimestampMismatchError
+                    )
                 
-                # Cancel merged order
-                order.status = "Merged"
-                order.merged_into = primary.current_order
-                order.save(ignore_permissions=True)
+                frappe.db.sql("""
+                    UPDATE `tabRestaurant Order`
+                    SET status = 'Merged', modified = %s, modified_by = %s
+                    WHERE name = %s
+                """, (now, frappe.session.user, order_name))
+            
+            # Transfer items of all merged orders, read in one query
+            for item in frappe.get_all(
+                "Restaurant Order Item",
+                filters={"parent": ["in", orders_to_merge], "parenttype": "Restaurant Order"},
+                fields=ORDER_ITEM_FIELDS,
+                order_by="parent, idx"
+            ):
+                primary_order.append("items", item)
             
             # Recalculate totals
             primary_order.calculate_totals()
             primary_order.save(ignore_permissions=True)
         
-        # Clear merged tables
-        for tid in table_ids:
-            if tid == primary_table:
-                continue
-            frappe.db.set_value("Restaurant Table", tid, {
-                "status": "Available",
-                "current_order": None,
-                "current_session": None
-            })
+        # Clear merged tables in one statement
+        merged_ids = tuple(tid for tid in table_ids if tid != primary_table)
+        if merged_ids:
+            frappe.db.sql("""
+                UPDATE `tabRestaurant Table`
+                SET status = 'Available', current_order = NULL, current_session = NULL,
+                    modified = %s, modified_by = %s
+                WHERE name IN %s
+            """, (now_datetime(), frappe.session.user, merged_ids))
         
         # Update primary table info
-        merged_numbers = []
-        for tid in table_ids:
-            num = frappe.db.get_value("Restaurant Table", tid, "table_number")
-            merged_numbers.append(num)
+        merged_numbers = [tables[tid].table_number if tid in tables else None for tid in table_ids]
         
         frappe.db.commit()
 
@@ -365,6 +394,7 @@ def merge_tables(table_ids, primary_table):
         }
         
     except Exception as e:
+        frappe.db.rollback()
         frappe.log_error(f"Merge Tables Error: {str(e)}", "Restaurant POS")
         return {"success": False, "message": str(e)}
 
@@ -381,7 +411,7 @@ def get_waiter_calls(branch=None):
         list: Pending calls
     """
     if not branch:
-        branch = frappe.defaults.get_user_default("branch")
+        branch = get_current_branch()
     
     user = frappe.session.user
     
@@ -420,6 +450,8 @@ def respond_to_call(call_id, action="attend"):
     """
     Respond to a waiter call
     
+    Writes are committed at the end of the request, not here.
+    
     Args:
         call_id: Call ID
         action: Action taken (attend, complete, dismiss)
@@ -428,21 +460,28 @@ def respond_to_call(call_id, action="attend"):
         dict: Confirmation
     """
     try:
-        call = frappe.get_doc("Waiter Call", call_id)
+        call = frappe.db.get_value(
+            "Waiter Call", call_id, ["table_number", "restaurant_table"], as_dict=True
+        )
+        if not call:
+            frappe.throw(_("Waiter Call {0} not found").format(call_id), frappe.DoesNotExistError)
         
+        now = now_datetime()
         if action == "attend":
-            call.status = "Attended"
-            call.attended_at = now_datetime()
-            call.attended_by = frappe.session.user
+            values = {
+                "status": "Attended",
+                "attended_at": now,
+                "attended_by": frappe.session.user
+            }
         elif action == "complete":
-            call.status = "Completed"
-            call.completed_at = now_datetime()
+            values = {"status": "Completed", "completed_at": now}
         elif action == "dismiss":
-            call.status = "Dismissed"
-            call.completed_at = now_datetime()
+            values = {"status": "Dismissed", "completed_at": now}
+        else:
+            return {"success": False, "message": _("Invalid action")}
         
-        call.save(ignore_permissions=True)
-        frappe.db.commit()
+        # Plain status flip: skip loading and saving the whole document
+        frappe.db.set_value("Waiter Call", call_id, values, update_modified=False)
         
         # Notify table if using digital menu
         frappe.publish_realtime(
@@ -450,9 +489,10 @@ def respond_to_call(call_id, action="attend"):
             message={
                 "call_id": call_id,
                 "table_number": call.table_number,
-                "status": call.status
+                "status": values["status"]
             },
-            room=f"table:{call.restaurant_table}"
+            room=f"table:{call.restaurant_table}",
+            after_commit=True
         )
         
         return {"success": True, "message": _("Call updated")}
@@ -473,39 +513,41 @@ def get_ready_orders(branch=None):
         list: Ready orders
     """
     if not branch:
-        branch = frappe.defaults.get_user_default("branch")
+        branch = get_current_branch()
     
     user = frappe.session.user
     
-    # Get tables assigned to waiter
-    my_tables = frappe.get_all(
-        "Restaurant Table",
-        filters={"assigned_waiter": user, "branch": branch},
-        pluck="name"
-    )
+    # Flag KOTs on the waiter's own tables in the same query
+    orders = frappe.db.sql("""
+        SELECT
+            ko.name, ko.restaurant_order, ko.table_number,
+            ko.kitchen_station, ko.completed_at, ko.restaurant_table,
+            COALESCE(rt.assigned_waiter = %(user)s AND rt.branch = %(branch)s, 0) AS is_my_table
+        FROM `tabKitchen Order` ko
+        LEFT JOIN `tabRestaurant Table` rt ON rt.name = ko.restaurant_table
+        WHERE ko.branch = %(branch)s AND ko.status = 'Ready'
+        ORDER BY ko.completed_at ASC
+    """, {"user": user, "branch": branch}, as_dict=True)
+    
+    # Get ready items for all KOTs in one query
+    items_by_kot = defaultdict(list)
+    if orders:
+        for item in frappe.get_all(
+            "Kitchen Order Item",
+            filters={
+                "parent": ["in", [order.name for order in orders]],
+                "parenttype": "Kitchen Order",
+                "status": "Ready"
+            },
+            fields=["parent", "item_name", "qty"],
+            order_by="parent asc, idx asc"
+        ):
+            items_by_kot[item.parent].append({"name": item.item_name, "qty": item.qty})
     
-    orders = frappe.get_all(
-        "Kitchen Order",
-        filters={
-            "branch": branch,
-            "status": "Ready"
-        },
-        fields=[
-            "name", "restaurant_order", "table_number",
-            "kitchen_station", "completed_at", "restaurant_table"
-        ],
-        order_by="completed_at asc"
-    )
+    now = now_datetime()
     
     result = []
     for order in orders:
-        # Get items
-        items = frappe.get_all(
-            "Kitchen Order Item",
-            filters={"parent": order.name, "status": "Ready"},
-            fields=["item_name", "qty"]
-        )
-        
         result.append({
             "kot_id": order.name,
             "order_id": order.restaurant_order,
@@ -513,10 +555,10 @@ def get_ready_orders(branch=None):
             "station": order.kitchen_station,
             "ready_since": str(order.completed_at) if order.completed_at else None,
             "minutes_waiting": int(
-                (now_datetime() - order.completed_at).total_seconds() / 60
+                (now - order.completed_at).total_seconds() / 60
             ) if order.completed_at else 0,
-            "items": [{"name": i.item_name, "qty": i.qty} for i in items],
-            "is_my_table": order.restaurant_table in my_tables if order.restaurant_table else False
+            "items": items_by_kot[order.name],
+            "is_my_table": bool(order.is_my_table)
         })
     
     return {"success": True, "data": result}
@@ -542,6 +584,8 @@ def close_table(table_id):
     """
     Close table and end session
     
+    Writes are committed at the end of the request, not here.
+    
     Args:
         table_id: Table ID
     
@@ -553,13 +597,11 @@ def close_table(table_id):
         
         # Check for active kitchen orders before closing
         if table.current_order:
-            open_kots = frappe.db.exists(
-                "Kitchen Order",
-                {
-                    "restaurant_order": table.current_order,
-                    "status": ["in", ["Pending", "Preparing"]]
-                }
-            )
+            open_kots = frappe.db.sql("""
+                SELECT 1 FROM `tabKitchen Order`
+                WHERE restaurant_order = %s AND status IN ('Pending', 'Preparing')
+                LIMIT 1
+            """, table.current_order)
             if open_kots:
                 return {
                     "success": False,
@@ -587,12 +629,11 @@ def close_table(table_id):
             )
         
         # Reset table
-        table.status = "Available"
-        table.current_order = None
-        table.current_session = None
-        table.save(ignore_permissions=True)
-        
-        frappe.db.commit()
+        frappe.db.set_value("Restaurant Table", table_id, {
+            "status": "Available",
+            "current_order": None,
+            "current_session": None
+        })
         
         return {"success": True, "message": _("Table closed")}
         
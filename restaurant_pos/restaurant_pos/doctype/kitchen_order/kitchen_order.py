@@ -6,6 +6,14 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now_datetime
 
+from restaurant_pos.restaurant_pos.utils import validate_header_mandatory
+
+# Kitchen Order Item columns filled when KOT lines are bulk-inserted
+KOT_ITEM_FIELDS = [
+    "order_item", "menu_item", "item_name", "item_name_ar", "qty",
+    "modifiers", "special_instructions", "status"
+]
+
 
 class KitchenOrder(Document):
     def validate(self):
@@ -40,30 +48,29 @@ class KitchenOrder(Document):
                 "table_number": self.table_number,
                 "station": self.kitchen_station
             },
-            room=f"kitchen:{self.branch}"
+            room=f"kitchen:{self.branch}",
+            after_commit=True
         )
     
     def mark_ready(self):
         """Mark KOT as ready"""
+        now = now_datetime()
         self.status = "Ready"
-        self.completed_at = now_datetime()
+        self.completed_at = now
         
+        # Flip item statuses and collect the linked order items in one pass
+        order_items = set()
         for item in self.items:
             if item.status != "Ready":
                 item.status = "Ready"
-                item.completed_at = now_datetime()
+                item.completed_at = now
+            if item.order_item:
+                order_items.add(item.order_item)
         
         self.save(ignore_permissions=True)
         
         # Update order items
-        for item in self.items:
-            if item.order_item:
-                frappe.db.set_value(
-                    "Restaurant Order Item",
-                    item.order_item,
-                    "status",
-                    "Ready"
-                )
+        self.set_order_items_status("Ready", order_items, now)
         
         # Notify waiters
         frappe.publish_realtime(
@@ -74,28 +81,37 @@ class KitchenOrder(Document):
                 "table_number": self.table_number,
                 "station": self.kitchen_station
             },
-            room=f"waiters:{self.branch}"
+            room=f"waiters:{self.branch}",
+            after_commit=True
         )
     
     def mark_served(self):
         """Mark KOT as served"""
+        now = now_datetime()
         self.status = "Served"
-        self.served_at = now_datetime()
+        self.served_at = now
         
+        order_items = set()
         for item in self.items:
             item.status = "Served"
+            if item.order_item:
+                order_items.add(item.order_item)
         
         self.save(ignore_permissions=True)
         
         # Update order items
-        for item in self.items:
-            if item.order_item:
-                frappe.db.set_value(
-                    "Restaurant Order Item",
-                    item.order_item,
-                    "status",
-                    "Served"
-                )
+        self.set_order_items_status("Served", order_items, now)
+    
+    def set_order_items_status(self, status, order_items, now):
+        """Set the status of the linked Restaurant Order Items in one UPDATE"""
+        if not order_items:
+            return
+        
+        frappe.db.sql("""
+            UPDATE `tabRestaurant Order Item`
+            SET status = %s, modified = %s, modified_by = %s
+            WHERE name IN %s
+        """, (status, now, frappe.session.user, tuple(order_items)))
     
     def get_preparation_time(self):
         """Get preparation time in seconds"""
@@ -106,3 +122,41 @@ class KitchenOrder(Document):
     def get_elapsed_time(self):
         """Get time since creation"""
         return (now_datetime() - self.creation).total_seconds()
+
+
+def on_doctype_update():
+    """Composite indexes for the KDS queue, per-order rollups and ready pickups"""
+    frappe.db.add_index(
+        "Kitchen Order",
+        ["branch", "kitchen_station", "status", "priority", "creation"],
+        "branch_station_status_priority_index"
+    )
+    frappe.db.add_index("Kitchen Order", ["restaurant_order"])
+    frappe.db.add_index("Kitchen Order", ["branch", "status", "completed_at"])
+
+
+def insert_kitchen_order(kot, items):
+    """Insert a new KOT header, then all its item rows with a single INSERT"""
+    if not items:
+        frappe.throw(_("Kitchen order must have at least one item"))
+    
+    # The lines are written below, so only the items table is exempt from the
+    # required-field and non-empty checks on the header
+    validate_header_mandatory(kot)
+    kot.flags.ignore_validate = True
+    kot.flags.ignore_mandatory = True
+    kot.insert(ignore_permissions=True)
+    
+    user = frappe.session.user
+    fields = [
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "parent", "parenttype", "parentfield", "idx"
+    ] + KOT_ITEM_FIELDS
+    
+    frappe.db.bulk_insert("Kitchen Order Item", fields, [
+        [
+            frappe.generate_hash(length=10), kot.creation, kot.creation, user, user, kot.docstatus,
+            kot.name, "Kitchen Order", "items", idx
+        ] + [item.get(fieldname) for fieldname in KOT_ITEM_FIELDS]
+        for idx, item in enumerate(items, start=1)
+    ])
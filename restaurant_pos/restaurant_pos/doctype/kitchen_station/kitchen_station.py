@@ -5,4 +5,12 @@ from frappe.model.document import Document
 
 
 class KitchenStation(Document):
-    pass
+    def on_update(self):
+        self.clear_user_stations_cache()
+    
+    def on_trash(self):
+        self.clear_user_stations_cache()
+    
+    def clear_user_stations_cache(self):
+        from restaurant_pos.restaurant_pos.api.boot import clear_kitchen_stations_cache
+        clear_kitchen_stations_cache()
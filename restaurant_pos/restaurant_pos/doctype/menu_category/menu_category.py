@@ -5,23 +5,52 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import now_datetime
 
+from restaurant_pos.restaurant_pos.utils import get_day_mask, is_day_in_mask
+
+# Deepest category nesting walked when checking for cycles
+MAX_CATEGORY_DEPTH = 64
+
 
 class MenuCategory(Document):
     def validate(self):
         self.validate_circular_reference()
         self.validate_availability_time()
+        self.day_mask = get_day_mask(self.available_days)
+    
+    def on_update(self):
+        self.clear_menu_cache()
+    
+    def on_trash(self):
+        self.clear_menu_cache()
+    
+    def clear_menu_cache(self):
+        """Drop cached digital menu payloads"""
+        from restaurant_pos.restaurant_pos.api.menu import clear_menu_cache
+        clear_menu_cache()
     
     def validate_circular_reference(self):
         """Prevent circular parent-child relationships"""
-        if self.parent_category:
-            parent = self.parent_category
-            visited = set([self.name])
-            
-            while parent:
-                if parent in visited:
-                    frappe.throw(f"Circular reference detected: {parent}")
-                visited.add(parent)
-                parent = frappe.db.get_value("Menu Category", parent, "parent_category")
+        if not self.parent_category:
+            return
+        
+        # Walk the whole ancestor chain in one query, bounded in case a cycle already exists
+        ancestors = frappe.db.sql("""
+            WITH RECURSIVE ancestors (name, parent_category, depth) AS (
+                SELECT name, parent_category, 0
+                FROM `tabMenu Category`
+                WHERE name = %(parent)s
+                UNION ALL
+                SELECT category.name, category.parent_category, ancestors.depth + 1
+                FROM `tabMenu Category` category
+                INNER JOIN ancestors ON category.name = ancestors.parent_category
+                WHERE ancestors.depth < %(max_depth)s
+            )
+            SELECT name, depth FROM ancestors
+        """, {"parent": self.parent_category, "max_depth": MAX_CATEGORY_DEPTH}, as_dict=True)
+        
+        for ancestor in ancestors:
+            if ancestor.name == self.name or ancestor.depth >= MAX_CATEGORY_DEPTH:
+                frappe.throw(f"Circular reference detected: {ancestor.name}")
     
     def validate_availability_time(self):
         """Validate from/to times"""
@@ -36,13 +65,10 @@ class MenuCategory(Document):
         
         now = now_datetime()
         current_time = now.time()
-        current_day = now.strftime("%A")
         
         # Check day availability
-        if self.available_days:
-            available_days = [d.day for d in self.available_days]
-            if current_day not in available_days:
-                return False
+        if not is_day_in_mask(self.day_mask, now):
+            return False
         
         # Check time availability
         if self.available_from and current_time < self.available_from:
@@ -64,3 +90,7 @@ class MenuCategory(Document):
             fields=["name", "item_name", "item_name_ar", "price", "image"],
             order_by="display_order asc"
         )
+
+
+def on_doctype_update():
+    frappe.db.add_index("Menu Category", ["is_active", "branch", "display_order"])
@@ -1,17 +1,35 @@
 # Copyright (c) 2026, Ahmad and contributors
 # For license information, please see license.txt
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now_datetime, getdate
 
+from restaurant_pos.restaurant_pos.utils import get_day_mask, is_day_in_mask
+
 
 class MenuItem(Document):
     def validate(self):
         self.validate_pricing()
         self.validate_availability_time()
         self.update_sold_out_status()
+        self.day_mask = get_day_mask(self.available_days)
+    
+    def on_update(self):
+        self.clear_menu_cache()
+    
+    def on_trash(self):
+        self.clear_menu_cache()
+    
+    def clear_menu_cache(self):
+        """Drop cached digital menu payloads and order pricing data"""
+        from restaurant_pos.restaurant_pos.api.menu import clear_menu_cache
+        from restaurant_pos.restaurant_pos.api.order import clear_order_menu_items_cache
+        clear_menu_cache()
+        clear_order_menu_items_cache()
     
     def validate_pricing(self):
         """Ensure price is valid"""
@@ -41,13 +59,10 @@ class MenuItem(Document):
         
         now = now_datetime()
         current_time = now.time()
-        current_day = now.strftime("%A")
         
         # Check day availability
-        if self.available_days:
-            available_days = [d.day for d in self.available_days]
-            if current_day not in available_days:
-                return False
+        if not is_day_in_mask(self.day_mask, now):
+            return False
         
         # Check time availability
         if self.available_from and current_time < self.available_from:
@@ -72,9 +87,36 @@ class MenuItem(Document):
         if not self.allow_customization or not self.modifiers:
             return []
         
+        modifier_names = list({mod_link.modifier for mod_link in self.modifiers})
+        modifiers = {
+            modifier.name: modifier
+            for modifier in frappe.get_all(
+                "Menu Item Modifier",
+                filters={"name": ["in", modifier_names]},
+                fields=["name", "modifier_name", "modifier_name_ar", "selection_type"]
+            )
+        }
+        
+        options_by_modifier = defaultdict(list)
+        for opt in frappe.get_all(
+            "Menu Item Modifier Option",
+            filters={"parent": ["in", modifier_names], "parenttype": "Menu Item Modifier"},
+            fields=["parent", "name", "option_name", "option_name_ar", "additional_price", "is_default"],
+            order_by="parent asc, idx asc"
+        ):
+            options_by_modifier[opt.parent].append({
+                "name": opt.name,
+                "label": opt.option_name,
+                "label_ar": opt.option_name_ar,
+                "price": opt.additional_price or 0,
+                "is_default": opt.is_default
+            })
+        
         result = []
         for mod_link in self.modifiers:
-            modifier = frappe.get_doc("Menu Item Modifier", mod_link.modifier)
+            modifier = modifiers.get(mod_link.modifier)
+            if not modifier:
+                continue
             result.append({
                 "name": modifier.name,
                 "title": modifier.modifier_name,
@@ -83,13 +125,7 @@ class MenuItem(Document):
                 "required": mod_link.is_required,
                 "min_selections": mod_link.min_selections or 0,
                 "max_selections": mod_link.max_selections or 99,
-                "options": [{
-                    "name": opt.name,
-                    "label": opt.option_name,
-                    "label_ar": opt.option_name_ar,
-                    "price": opt.additional_price or 0,
-                    "is_default": opt.is_default
-                } for opt in modifier.options]
+                "options": options_by_modifier[modifier.name]
             })
         
         return result
@@ -143,3 +179,17 @@ class MenuItem(Document):
     def get_dietary_tags_list(self):
         """Get list of dietary tags"""
         return [t.tag for t in self.dietary_tags] if self.dietary_tags else []
+
+
+def on_doctype_update():
+    """Indexes for the digital menu listing and search"""
+    frappe.db.add_index("Menu Item", ["is_active", "category", "display_order"])
+    
+    # FULLTEXT index backing menu search (MariaDB only)
+    if frappe.db.db_type != "mariadb" or frappe.db.has_index("tabMenu Item", "menu_search_fulltext"):
+        return
+    
+    frappe.db.sql_ddl("""
+        ALTER TABLE `tabMenu Item`
+        ADD FULLTEXT INDEX menu_search_fulltext (item_name, item_name_ar, description, description_ar)
+    """)
@@ -5,4 +5,13 @@ from frappe.model.document import Document
 
 
 class MenuItemModifier(Document):
-    pass
+    def on_update(self):
+        self.clear_menu_cache()
+    
+    def on_trash(self):
+        self.clear_menu_cache()
+    
+    def clear_menu_cache(self):
+        """Drop cached digital menu payloads"""
+        from restaurant_pos.restaurant_pos.api.menu import clear_menu_cache
+        clear_menu_cache()
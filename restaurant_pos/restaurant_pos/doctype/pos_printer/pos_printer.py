@@ -12,5 +12,5 @@ class POSPrinter(Document):
 			frappe.db.sql("""
 				UPDATE `tabPOS Printer`
 				SET is_default = 0
-				WHERE name != %s
+				WHERE is_default = 1 AND name != %s
 			""", self.name)
@@ -1,11 +1,23 @@
 # Copyright (c) 2026, Ahmad and contributors
 # For license information, please see license.txt
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now_datetime, flt
 
+from restaurant_pos.restaurant_pos.doctype.kitchen_order.kitchen_order import insert_kitchen_order
+
+# Order fields mirrored onto Restaurant Table so the floor view needs no join
+TABLE_ORDER_SUMMARY_FIELDS = {
+    "status": "order_status",
+    "guest_count": "order_guest_count",
+    "grand_total": "order_grand_total",
+    "creation": "order_started_at"
+}
+
 
 class RestaurantOrder(Document):
     def validate(self):
@@ -20,52 +32,56 @@ class RestaurantOrder(Document):
     
     def calculate_totals(self):
         """Calculate order totals"""
-        self.total_qty = 0
-        self.subtotal = 0
+        total_qty = subtotal = tax_amount = 0
         
+        # Amounts, quantity and tax in a single pass over the items
         for item in self.items:
-            item.amount = flt(item.rate) * flt(item.qty)
-            self.total_qty += flt(item.qty)
-            self.subtotal += flt(item.amount)
+            qty = flt(item.qty)
+            item.amount = flt(item.rate) * qty
+            total_qty += qty
+            subtotal += item.amount
+            
+            # Simplified tax calculation
+            # For production, use Item Tax Templates
+            if item.tax_rate:
+                tax_amount += item.amount * flt(item.tax_rate) / 100
+        
+        self.total_qty = total_qty
+        self.subtotal = subtotal
+        self.tax_amount = tax_amount
         
         # Apply service charge
         settings = frappe.get_cached_doc("Restaurant Settings")
         if settings.service_charge_percent:
-            self.service_charge = flt(self.subtotal) * flt(settings.service_charge_percent) / 100
+            self.service_charge = subtotal * flt(settings.service_charge_percent) / 100
         else:
             self.service_charge = 0
         
-        # Calculate tax (simplified - you may want to use tax templates)
-        self.tax_amount = self.calculate_tax()
-        
         # Calculate grand total
         self.grand_total = (
-            flt(self.subtotal) +
-            flt(self.tax_amount) +
-            flt(self.service_charge) +
+            subtotal +
+            tax_amount +
+            self.service_charge +
             flt(self.tip_amount) -
             flt(self.discount_amount)
         )
     
-    def calculate_tax(self):
-        """Calculate tax amount"""
-        # Simplified tax calculation
-        # For production, use Item Tax Templates
-        total_tax = 0
-        for item in self.items:
-            if item.tax_rate:
-                total_tax += flt(item.amount) * flt(item.tax_rate) / 100
-        return total_tax
-    
     def update_table_status(self):
-        """Update table with current order"""
-        if self.restaurant_table and self.status not in ["Cancelled", "Completed", "Paid"]:
+        """Update table with current order and its floor-view summary"""
+        if not self.restaurant_table:
+            return
+        
+        if self.status not in ["Cancelled", "Completed", "Paid"]:
             frappe.db.set_value(
                 "Restaurant Table",
                 self.restaurant_table,
                 "current_order",
                 self.name
             )
+        
+        update_table_order_summary(self.name, {
+            field: self.get(field) for field in TABLE_ORDER_SUMMARY_FIELDS
+        })
     
     def confirm_order(self):
         """Confirm order and send to kitchen"""
@@ -76,38 +92,37 @@ class RestaurantOrder(Document):
         self.confirmed_at = now_datetime()
         self.save(ignore_permissions=True)
         
-        # Create kitchen orders
-        self.create_kitchen_orders()
-        
-        # Notify kitchen
-        frappe.publish_realtime(
-            event="restaurant:new_order",
-            message={
-                "order_id": self.name,
-                "table_number": self.table_number,
-                "order_type": self.order_type
-            },
-            room=f"kitchen:{self.branch}"
+        # Create and print kitchen orders in the background once the confirm is committed
+        frappe.enqueue(
+            "restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order.create_kitchen_orders_job",
+            queue="short",
+            enqueue_after_commit=True,
+            order_name=self.name
         )
         
         return True
     
     def create_kitchen_orders(self):
         """Create Kitchen Order Tickets (KOTs) grouped by station"""
+        settings = frappe.get_cached_doc("Restaurant Settings")
+        items_to_send = [
+            item for item in self.items if item.status in ["Pending", "Sent to Kitchen"]
+        ]
+        
+        # Read the kitchen stations of all items in one query
+        stations = dict(frappe.get_all(
+            "Menu Item",
+            filters={"name": ["in", list({item.menu_item for item in items_to_send})]},
+            fields=["name", "kitchen_station"],
+            as_list=True
+        )) if items_to_send else {}
+        
         # Group items by kitchen station
-        station_items = {}
+        station_items = defaultdict(list)
         
-        for item in self.items:
-            if item.status in ["Pending", "Sent to Kitchen"]:
-                menu_item = frappe.get_doc("Menu Item", item.menu_item)
-                station = menu_item.kitchen_station or frappe.db.get_single_value(
-                    "Restaurant Settings", "default_kitchen_station"
-                )
-                
-                if station not in station_items:
-                    station_items[station] = []
-                
-                station_items[station].append(item)
+        for item in items_to_send:
+            station = stations.get(item.menu_item) or settings.default_kitchen_station
+            station_items[station].append(item)
         
         # Create KOT for each station
         for station, items in station_items.items():
@@ -120,12 +135,12 @@ class RestaurantOrder(Document):
                 "branch": self.branch,
                 "kitchen_station": station,
                 "status": "Pending",
-                "notes": self.special_instructions,
-                "items": []
+                "notes": self.special_instructions
             })
             
+            kot_items = []
             for item in items:
-                kot.append("items", {
+                kot_items.append({
                     "order_item": item.name,
                     "menu_item": item.menu_item,
                     "item_name": item.item_name,
@@ -136,18 +151,21 @@ class RestaurantOrder(Document):
                     "status": "Pending"
                 })
                 
-                # Update item status
                 item.status = "Sent to Kitchen"
-                item.db_update()
             
-            kot.insert(ignore_permissions=True)
+            insert_kitchen_order(kot, kot_items)
             
             # Auto print KOT
-            settings = frappe.get_cached_doc("Restaurant Settings")
             if settings.auto_print_kot:
                 self.print_kot(kot.name)
         
-        frappe.db.commit()
+        # Update item status for all sent lines in one statement
+        if items_to_send:
+            frappe.db.sql("""
+                UPDATE `tabRestaurant Order Item`
+                SET status = 'Sent to Kitchen'
+                WHERE name IN %s
+            """, (tuple(item.name for item in items_to_send),))
     
     def print_kot(self, kot_name):
         """Print Kitchen Order Ticket"""
@@ -239,13 +257,11 @@ class RestaurantOrder(Document):
         self.save(ignore_permissions=True)
         
         # Cancel all kitchen orders
-        kots = frappe.get_all(
-            "Kitchen Order",
-            filters={"restaurant_order": self.name},
-            pluck="name"
-        )
-        for kot_name in kots:
-            frappe.db.set_value("Kitchen Order", kot_name, "status", "Cancelled")
+        frappe.db.sql("""
+            UPDATE `tabKitchen Order`
+            SET status = 'Cancelled', modified = %s, modified_by = %s
+            WHERE restaurant_order = %s
+        """, (now_datetime(), frappe.session.user, self.name))
         
         # Free up table
         if self.restaurant_table:
@@ -257,5 +273,42 @@ class RestaurantOrder(Document):
                     "current_order": None
                 }
             )
-        
-        frappe.db.commit()
+
+
+def on_doctype_update():
+    """Composite index for per-session order lookups and totals"""
+    frappe.db.add_index("Restaurant Order", ["table_session", "status"])
+
+
+def create_kitchen_orders_job(order_name):
+    """Background job: create (and auto print) a confirmed order's KOTs, committed by the worker"""
+    order = frappe.get_doc("Restaurant Order", order_name)
+    order.create_kitchen_orders()
+    
+    # Notify kitchen once the tickets it will load are committed
+    frappe.publish_realtime(
+        event="restaurant:new_order",
+        message={
+            "order_id": order.name,
+            "table_number": order.table_number,
+            "order_type": order.order_type
+        },
+        room=f"kitchen:{order.branch}",
+        after_commit=True
+    )
+
+
+def update_table_order_summary(order_name, values):
+    """Copy changed order fields onto the table currently holding the order"""
+    summary = {
+        TABLE_ORDER_SUMMARY_FIELDS[field]: value
+        for field, value in values.items()
+        if field in TABLE_ORDER_SUMMARY_FIELDS
+    }
+    if summary:
+        frappe.db.set_value(
+            "Restaurant Table",
+            {"current_order": order_name},
+            summary,
+            update_modified=False
+        )
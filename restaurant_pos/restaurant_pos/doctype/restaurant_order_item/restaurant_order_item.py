@@ -1,8 +1,13 @@
 # Copyright (c) 2026, Ahmad and contributors
 # For license information, please see license.txt
 
+import frappe
 from frappe.model.document import Document
 
 
 class RestaurantOrderItem(Document):
     pass
+
+
+def on_doctype_update():
+    frappe.db.add_index("Restaurant Order Item", ["status"])
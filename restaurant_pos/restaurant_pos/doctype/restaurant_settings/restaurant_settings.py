@@ -13,6 +13,15 @@ class RestaurantSettings(Document):
         if self.service_charge_percent and self.service_charge_percent > 100:
             frappe.throw("Service charge cannot exceed 100%")
     
+    def on_update(self):
+        from restaurant_pos.restaurant_pos.api.boot import clear_boot_settings_cache
+        from restaurant_pos.restaurant_pos.api.menu import clear_currency_info_cache, clear_menu_cache
+        from restaurant_pos.restaurant_pos.api.order import clear_order_charges_cache
+        clear_boot_settings_cache()
+        clear_currency_info_cache()
+        clear_menu_cache()
+        clear_order_charges_cache()
+    
     @staticmethod
     def get_settings():
         """Get restaurant settings as dict"""
@@ -5,7 +5,7 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 import hashlib
-import qrcode
+import segno
 from io import BytesIO
 import base64
 
@@ -21,6 +21,20 @@ class RestaurantTable(Document):
         if self.capacity and self.capacity < 1:
             frappe.throw(_("Table capacity must be at least 1"))
     
+    def on_update(self):
+        self.clear_qr_cache()
+    
+    def on_trash(self):
+        self.clear_qr_cache()
+    
+    def clear_qr_cache(self):
+        """Drop cached QR lookups for this table, including a replaced code"""
+        from restaurant_pos.restaurant_pos.api.menu import clear_table_by_code_cache
+        previous = self.get_doc_before_save()
+        clear_table_by_code_cache(
+            self.qr_code_id, previous.qr_code_id if previous else None
+        )
+    
     def generate_qr_code(self):
         """Generate unique QR code for this table"""
         # Generate unique ID
@@ -34,20 +48,12 @@ class RestaurantTable(Document):
             
             qr_url = f"{base_url}/menu?table={self.qr_code_id}"
             
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_url)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
+            # segno writes the PNG directly, without building a PIL image first
+            qr = segno.make_qr(qr_url, error="l")
             
             # Save to file
             buffer = BytesIO()
-            img.save(buffer, format="PNG")
+            qr.save(buffer, kind="png", scale=10, border=4, dark="black", light="white")
             buffer.seek(0)
             
             # Save as attachment
@@ -121,10 +127,14 @@ class RestaurantTable(Document):
                 }
             )
         
-        self.status = "Available"
-        self.current_order = None
-        self.current_session = None
-        self.save(ignore_permissions=True)
+        # Only these fields change; skip the full save and its hooks
+        values = {
+            "status": "Available",
+            "current_order": None,
+            "current_session": None
+        }
+        self.update(values)
+        frappe.db.set_value("Restaurant Table", self.name, values)
 
 
 @frappe.whitelist()
@@ -133,3 +143,9 @@ def regenerate_qr(table_name):
     table = frappe.get_doc("Restaurant Table", table_name)
     table.regenerate_qr_code()
     return {"success": True, "qr_code_id": table.qr_code_id}
+
+
+def on_doctype_update():
+    """Composite indexes for the waiter's own tables and the floor view"""
+    frappe.db.add_index("Restaurant Table", ["assigned_waiter", "branch"])
+    frappe.db.add_index("Restaurant Table", ["branch", "location"])
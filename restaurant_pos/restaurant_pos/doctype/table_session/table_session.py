@@ -17,3 +17,8 @@ class TableSession(Document):
         self.status = "Closed"
         self.ended_at = now_datetime()
         self.save(ignore_permissions=True)
+
+
+def on_doctype_update():
+    """Composite index for finding a table's open session"""
+    frappe.db.add_index("Table Session", ["restaurant_table", "status"])
@@ -24,7 +24,8 @@ class WaiterCall(Document):
                 "call_type": self.call_type,
                 "notes": self.notes
             },
-            room=f"waiters:{self.branch}"
+            room=f"waiters:{self.branch}",
+            after_commit=True
         )
         
         # Also notify specific waiter if assigned
@@ -38,5 +39,11 @@ class WaiterCall(Document):
                     "notes": self.notes,
                     "urgent": True
                 },
-                user=waiter
+                user=waiter,
+                after_commit=True
             )
+
+
+def on_doctype_update():
+    """Composite index for a branch's pending calls"""
+    frappe.db.add_index("Waiter Call", ["branch", "status", "waiter"])
@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Event handlers for Branch
+"""
+
+from restaurant_pos.restaurant_pos.api.menu import clear_branch_warehouse_cache
+
+
+def on_update(doc, method):
+    """Drop the cached default warehouse for this branch"""
+    clear_branch_warehouse_cache(doc.name)
+
+
+def on_trash(doc, method):
+    """Drop the cached default warehouse for this branch"""
+    clear_branch_warehouse_cache(doc.name)
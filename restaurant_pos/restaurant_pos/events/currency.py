@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Ahmad and contributors
+# For license information, please see license.txt
+
+"""
+Event handlers for Global Defaults and Currency
+"""
+
+from restaurant_pos.restaurant_pos.api.menu import clear_currency_info_cache
+
+
+def on_update(doc, method):
+    """Drop the cached menu currency and symbol"""
+    clear_currency_info_cache()
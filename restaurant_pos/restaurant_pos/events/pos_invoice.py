@@ -9,6 +9,8 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order import update_table_order_summary
+
 
 def on_submit(doc, method):
     """Handle POS Invoice submission"""
@@ -32,11 +34,13 @@ def update_restaurant_order_payment(invoice):
             # Calculate total paid
             total_paid = flt(order.paid_amount) + flt(invoice.grand_total)
             
+            status = "Paid" if total_paid >= flt(order.grand_total) else order.status
             frappe.db.set_value("Restaurant Order", order.name, {
                 "paid_amount": total_paid,
                 "payment_status": "Paid" if total_paid >= flt(order.grand_total) else "Partial",
-                "status": "Paid" if total_paid >= flt(order.grand_total) else order.status
+                "status": status
             })
+            update_table_order_summary(order.name, {"status": status})
             
             # Update table status if fully paid
             if total_paid >= flt(order.grand_total) and order.restaurant_table:
@@ -70,34 +74,35 @@ def revert_restaurant_order_payment(invoice):
             "payment_status": "Paid" if total_paid >= flt(order.grand_total) else ("Partial" if total_paid > 0 else "Unpaid"),
             "status": "Served"  # Revert to served status
         })
+        update_table_order_summary(order.name, {"status": "Served"})
     except Exception as e:
         frappe.log_error(f"Error reverting restaurant order payment: {str(e)}")
 
 
 def check_and_update_table_status(table_name):
     """Check if all orders for a table are paid and update table status"""
-    unpaid_orders = frappe.get_all(
+    has_unpaid_orders = frappe.db.exists(
         "Restaurant Order",
-        filters={
+        {
             "restaurant_table": table_name,
             "status": ["not in", ["Cancelled", "Paid"]],
             "docstatus": 1
         }
     )
     
-    if not unpaid_orders:
+    if not has_unpaid_orders:
         # All orders paid - table can be cleaned
         frappe.db.set_value("Restaurant Table", table_name, "status", "Cleaning")
         
         # Close active session
-        active_session = frappe.get_all(
+        active_session = frappe.db.get_value(
             "Table Session",
-            filters={"restaurant_table": table_name, "status": "Active"},
-            limit=1
+            {"restaurant_table": table_name, "status": "Active"},
+            "name"
         )
         
         if active_session:
-            frappe.db.set_value("Table Session", active_session[0].name, {
+            frappe.db.set_value("Table Session", active_session, {
                 "status": "Closed",
                 "ended_at": frappe.utils.now_datetime()
             })
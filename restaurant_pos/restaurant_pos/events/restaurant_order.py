@@ -5,10 +5,14 @@
 Event handlers for Restaurant Order
 """
 
+from collections import defaultdict
+
 import frappe
 from frappe import _
 from frappe.utils import flt, now_datetime, cint
 
+from restaurant_pos.restaurant_pos.doctype.restaurant_order.restaurant_order import update_table_order_summary
+
 
 def on_submit(doc, method):
     """Handle Restaurant Order submission"""
@@ -57,17 +61,21 @@ def before_submit(doc, method):
 
 def create_kitchen_order(restaurant_order):
     """Create kitchen order from restaurant order"""
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
+    
+    # Read the kitchen stations of all items in one query
+    stations = dict(frappe.get_all(
+        "Menu Item",
+        filters={"name": ["in", list({item.menu_item for item in restaurant_order.items})]},
+        fields=["name", "kitchen_station"],
+        as_list=True
+    )) if restaurant_order.items else {}
     
     # Group items by station
-    station_items = {}
+    station_items = defaultdict(list)
     
     for item in restaurant_order.items:
-        menu_item = frappe.get_doc("Menu Item", item.menu_item)
-        station = menu_item.kitchen_station or settings.default_kitchen_station or "Main Kitchen"
-        
-        if station not in station_items:
-            station_items[station] = []
+        station = stations.get(item.menu_item) or settings.default_kitchen_station or "Main Kitchen"
         
         station_items[station].append({
             "menu_item": item.menu_item,
@@ -110,7 +118,8 @@ def create_kitchen_order(restaurant_order):
                 "items_count": len(items),
                 "order_type": restaurant_order.order_type
             },
-            room=f"kitchen_{station}"
+            room=f"kitchen_{station}",
+            after_commit=True
         )
 
 
@@ -185,7 +194,8 @@ def send_new_order_notification(order):
             "order_type": order.order_type,
             "items_count": len(order.items)
         },
-        doctype="Kitchen Order"
+        doctype="Kitchen Order",
+        after_commit=True
     )
     
     # Notify waiters
@@ -196,7 +206,8 @@ def send_new_order_notification(order):
                 "order": order.name,
                 "table": order.restaurant_table
             },
-            user=order.waiter
+            user=order.waiter,
+            after_commit=True
         )
 
 
@@ -206,6 +217,7 @@ def update_order_status(order_name, new_status):
     old_status = order.status
     
     frappe.db.set_value("Restaurant Order", order_name, "status", new_status)
+    update_table_order_summary(order_name, {"status": new_status})
     
     # Handle status-specific actions
     if new_status == "Ready":
@@ -216,7 +228,8 @@ def update_order_status(order_name, new_status):
                 "order": order_name,
                 "table": order.restaurant_table
             },
-            room="restaurant_waiter"
+            room="restaurant_waiter",
+            after_commit=True
         )
         
         # Notify customer
@@ -224,7 +237,8 @@ def update_order_status(order_name, new_status):
             frappe.publish_realtime(
                 "order_ready",
                 {"order": order_name},
-                room=f"table_{order.restaurant_table}"
+                room=f"table_{order.restaurant_table}",
+                after_commit=True
             )
     
     elif new_status == "Served":
@@ -253,6 +267,7 @@ def check_order_completion(restaurant_order_name):
             "status": "Ready",
             "ready_time": now_datetime()
         })
+        update_table_order_summary(restaurant_order_name, {"status": "Ready"})
         
         order = frappe.get_doc("Restaurant Order", restaurant_order_name)
         
@@ -54,7 +54,7 @@ def create_kitchen_stock_entry(kitchen_order_name):
     kitchen_order = frappe.get_doc("Kitchen Order", kitchen_order_name)
     restaurant_order = frappe.get_doc("Restaurant Order", kitchen_order.restaurant_order)
     
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
     
     if not settings.auto_consume_stock:
         return
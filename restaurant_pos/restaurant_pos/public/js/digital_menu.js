@@ -50,6 +50,7 @@ class DigitalMenu {
     async loadMenu() {
         const response = await frappe.call({
             method: 'restaurant_pos.api.menu.get_menu',
+            type: 'GET',
             args: {
                 table_id: this.tableId,
                 lang: this.lang
@@ -42,7 +42,7 @@ def monthly():
 
 def check_stale_orders():
     """Check for orders that have been pending too long"""
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
     stale_threshold = settings.get("stale_order_minutes") or 30
     
     threshold_time = add_to_date(now_datetime(), minutes=-stale_threshold)
@@ -73,7 +73,7 @@ def check_stale_orders():
 
 def check_abandoned_carts():
     """Check for abandoned customer sessions"""
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
     abandon_threshold = settings.get("cart_abandon_minutes") or 60
     
     threshold_time = add_to_date(now_datetime(), minutes=-abandon_threshold)
@@ -213,14 +213,14 @@ def generate_daily_report():
     frappe.cache().hset("daily_reports", str(yesterday.date()), report_data)
     
     # Send summary notification
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
     if settings.get("daily_report_email"):
         send_daily_report_email(report_data, settings.daily_report_email)
 
 
 def archive_old_orders():
     """Archive orders older than retention period"""
-    settings = frappe.get_single("Restaurant Settings")
+    settings = frappe.get_cached_doc("Restaurant Settings")
     retention_days = settings.get("order_retention_days") or 365
     
     threshold = add_to_date(now_datetime(), days=-retention_days)
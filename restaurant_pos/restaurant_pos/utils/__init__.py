@@ -8,7 +8,9 @@ Utility functions for Restaurant POS
 import frappe
 import json
 from frappe import _
+from frappe.model import table_fields
 from frappe.utils import cint, flt, now_datetime, get_datetime, time_diff_in_seconds
+from frappe.utils.caching import request_cache
 
 __all__ = [
     "get_restaurant_settings",
@@ -19,12 +21,58 @@ __all__ = [
     "get_kitchen_order_priority",
     "format_time_elapsed",
     "get_available_menu_items",
+    "get_current_branch",
+    "get_day_mask",
+    "is_day_in_mask",
+    "validate_header_mandatory",
 ]
 
+# Bit per weekday, indexed like datetime.weekday() (Monday = 0)
+DAY_BITS = {
+    day: 1 << index
+    for index, day in enumerate(
+        ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+    )
+}
+
 
 def get_restaurant_settings():
     """Get restaurant settings"""
-    return frappe.get_single("Restaurant Settings")
+    return frappe.get_cached_doc("Restaurant Settings")
+
+
+@request_cache
+def get_current_branch():
+    """Get the session user's default branch, looked up once per request"""
+    return frappe.defaults.get_user_default("branch")
+
+
+def get_day_mask(days):
+    """Pack Available Day rows into a weekday bitmask (0 means every day)"""
+    mask = 0
+    for row in days or []:
+        mask |= DAY_BITS.get(row.day, 0)
+    return mask
+
+
+def is_day_in_mask(day_mask, date_time):
+    """Check a weekday bitmask against a datetime; an empty mask allows every day"""
+    return not day_mask or bool(day_mask >> date_time.weekday() & 1)
+
+
+def validate_header_mandatory(doc):
+    """Check required non-table fields of a doc whose child rows are inserted separately"""
+    # Fields with a default are filled in by insert() itself
+    missing = [
+        _(df.label)
+        for df in doc.meta.get("fields", {"reqd": 1})
+        if df.fieldtype not in table_fields and not df.default and doc.get(df.fieldname) in (None, "")
+    ]
+    if missing:
+        frappe.throw(
+            _("Mandatory fields required in {0}: {1}").format(_(doc.doctype), ", ".join(missing)),
+            frappe.MandatoryError
+        )
 
 
 def format_currency(amount, currency=None):
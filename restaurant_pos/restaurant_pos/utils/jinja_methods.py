@@ -18,7 +18,7 @@ from restaurant_pos.restaurant_pos.utils import (
 def get_restaurant_settings():
     """Get restaurant settings for templates"""
     try:
-        return frappe.get_single("Restaurant Settings")
+        return frappe.get_cached_doc("Restaurant Settings")
     except Exception:
         return frappe._dict()
 